@@ -0,0 +1,94 @@
+import asyncio
+import collections
+import typing
+
+
+class BatchResult:
+	__slots__ = ('index', 'endpoint', 'kwargs', 'result', 'error')
+
+	def __init__(self, index: int, endpoint: str, kwargs: dict, result=None, error: typing.Optional[BaseException] = None) -> None:
+		self.index = index
+		self.endpoint = endpoint
+		self.kwargs = kwargs
+		self.result = result
+		self.error = error
+
+	def __repr__(self) -> str:
+		state = f'error={self.error!r}' if self.error is not None else 'ok'
+		return f'<BatchResult index={self.index} endpoint={self.endpoint!r} {state}>'
+
+	@property
+	def ok(self) -> bool:
+		return self.error is None
+
+	def unwrap(self):
+		if self.error is not None:
+			raise self.error
+		return self.result
+
+
+async def _aiter(iterable) -> typing.AsyncIterator:
+	if hasattr(iterable, '__aiter__'):
+		async for item in iterable:
+			yield item
+	else:
+		for item in iterable:
+			yield item
+
+
+async def _call(client, index: int, endpoint: str, kwargs: dict, priority: str, tenant: typing.Hashable) -> BatchResult:
+	try:
+		method = getattr(client, endpoint, None) if not endpoint.startswith('_') else None
+		if method is None or not callable(method):
+			raise ValueError(f'unknown endpoint {endpoint!r}')
+
+		with client._call_as(priority, tenant):
+			result = await method(**kwargs)
+	except Exception as e:
+		return BatchResult(index, endpoint, kwargs, error=e)
+
+	return BatchResult(index, endpoint, kwargs, result=result)
+
+
+async def run_batch(
+	client,
+	calls: typing.Union[typing.Iterable[typing.Tuple[str, dict]], typing.AsyncIterable[typing.Tuple[str, dict]]],
+	*,
+	concurrency: int = 8,
+	ordered: bool = False,
+	priority: str = 'background',
+	tenant: typing.Hashable = None
+) -> typing.AsyncIterator[BatchResult]:
+	if concurrency < 1:
+		raise ValueError('concurrency must be at least 1')
+
+	# input is pulled lazily so at most `concurrency` calls (and their results) are held at once
+	calls = _aiter(calls).__aiter__()
+	pending: typing.Deque[asyncio.Task] = collections.deque()
+	index = 0
+	exhausted = False
+	try:
+		while True:
+			while not exhausted and len(pending) < concurrency:
+				try:
+					endpoint, kwargs = await calls.__anext__()
+				except StopAsyncIteration:
+					exhausted = True
+					break
+
+				pending.append(asyncio.ensure_future(_call(client, index, endpoint, dict(kwargs), priority, tenant)))
+				index += 1
+
+			if not pending:
+				return
+
+			if ordered:
+				yield await pending.popleft()
+			else:
+				done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+				for task in done:
+					pending.remove(task)
+					yield task.result()
+	finally:
+		for task in pending:
+			task.cancel()
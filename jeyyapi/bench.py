@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import typing
+
+import yarl
+
+from .client import JeyyAPIClient
+from .endpoints import ENDPOINTS, Endpoint
+from .mock import MockJeyyAPI, lognormal
+
+
+class BenchResult:
+	__slots__ = ('endpoint', 'concurrency', 'requests', 'errors', 'elapsed', 'latencies', 'peak_memory')
+
+	def __init__(self, endpoint: str, concurrency: int, requests: int, errors: int, elapsed: float, latencies: typing.List[float], peak_memory: typing.Optional[int]) -> None:
+		self.endpoint = endpoint
+		self.concurrency = concurrency
+		self.requests = requests
+		self.errors = errors
+		self.elapsed = elapsed
+		self.latencies = sorted(latencies)
+		self.peak_memory = peak_memory
+
+	@property
+	def throughput(self) -> float:
+		return self.requests / self.elapsed if self.elapsed else 0.0
+
+	def percentile(self, q: float) -> float:
+		if not self.latencies:
+			return 0.0
+		index = min(len(self.latencies) - 1, max(0, round(q * len(self.latencies)) - 1))
+		return self.latencies[index]
+
+
+def _arguments(endpoint: Endpoint, i: int, unique: bool) -> dict:
+	kwargs = {}
+	for param in endpoint.params:
+		if not param.required:
+			continue
+		if param.choices is not None:
+			kwargs[param.name] = param._choices_repr[0]
+		elif param.name.endswith('_url'):
+			kwargs[param.name] = f'https://example.com/{i if unique else 0}.png'
+		elif param.type is list:
+			kwargs[param.name] = ['a', 'b']
+		else:
+			kwargs[param.name] = param.type('1' if param.type is not str else f'bench {i if unique else 0}')
+	return kwargs
+
+
+async def run_benchmark(
+	endpoint: str = 'hearts',
+	*,
+	concurrency: typing.Iterable[int] = (1, 8, 32),
+	requests: int = 200,
+	unique: bool = True,
+	trace_memory: bool = True,
+	mock: typing.Optional[MockJeyyAPI] = None,
+	client_factory: typing.Optional[typing.Callable[[], JeyyAPIClient]] = None
+) -> typing.List[BenchResult]:
+	table = {e.name: e for e in ENDPOINTS}
+	if endpoint not in table:
+		raise ValueError(f'unknown endpoint {endpoint!r}')
+
+	mock = mock or MockJeyyAPI()
+	client_factory = client_factory or (lambda: JeyyAPIClient('bench'))
+	results = []
+	async with mock:
+		for level in concurrency:
+			client = client_factory()
+			client.base_url = yarl.URL(mock.base_url)
+			method = getattr(client, endpoint)
+			latencies: typing.List[float] = []
+			errors = 0
+			counter = iter(range(requests))
+
+			async def worker() -> None:
+				nonlocal errors
+				for i in counter:
+					kwargs = _arguments(table[endpoint], i, unique)
+					start = time.perf_counter()
+					try:
+						await method(**kwargs)
+					except Exception:
+						errors += 1
+					latencies.append(time.perf_counter() - start)
+
+			if trace_memory:
+				tracemalloc.start()
+			start = time.perf_counter()
+			await asyncio.gather(*(worker() for _ in range(level)))
+			elapsed = time.perf_counter() - start
+			peak = None
+			if trace_memory:
+				peak = tracemalloc.get_traced_memory()[1]
+				tracemalloc.stop()
+
+			if client.new_session:
+				await client.close()
+
+			results.append(BenchResult(endpoint, level, requests, errors, elapsed, latencies, peak))
+
+	return results
+
+
+def format_results(results: typing.Iterable[BenchResult]) -> str:
+	lines = [f"{'endpoint':<16}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'peak MiB':>10}"]
+	for r in results:
+		peak = f'{r.peak_memory / 1024 / 1024:.1f}' if r.peak_memory is not None else '-'
+		lines.append(
+			f'{r.endpoint:<16}{r.concurrency:>6}{r.throughput:>10.1f}'
+			f'{r.percentile(0.50) * 1000:>10.1f}{r.percentile(0.95) * 1000:>10.1f}{r.percentile(0.99) * 1000:>10.1f}'
+			f'{r.errors:>8}{peak:>10}'
+		)
+	return '\n'.join(lines)
+
+
+# best-of-runs budget for a bare `import jeyyapi`, enforced by tests/test_import_time.py
+IMPORT_BUDGET_MS = 75.0
+
+
+def measure_import_time(module: str = 'jeyyapi', runs: int = 5) -> typing.List[float]:
+	# each run is a fresh interpreter, otherwise everything after the first is already in sys.modules
+	times = []
+	for _ in range(runs):
+		proc = subprocess.run(
+			[sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+			capture_output=True, text=True, check=True
+		)
+		for line in proc.stderr.splitlines():
+			# import time: self [us] | cumulative | imported package
+			parts = line.split('|')
+			if len(parts) == 3 and parts[2].strip() == module:
+				times.append(int(parts[1]) / 1e6)
+
+	return times
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None) -> None:
+	parser = argparse.ArgumentParser(prog='python -m jeyyapi.bench', description='Benchmark JeyyAPIClient against a local mock JeyyAPI server.')
+	parser.add_argument('endpoints', nargs='*', default=['hearts'])
+	parser.add_argument('-c', '--concurrency', type=int, nargs='+', default=[1, 8, 32])
+	parser.add_argument('-n', '--requests', type=int, default=200)
+	parser.add_argument('--latency', type=float, default=0.05, help='median server latency in seconds')
+	parser.add_argument('--sigma', type=float, default=0.5, help='lognormal spread of server latency, 0 for fixed')
+	parser.add_argument('--payload', type=int, default=256 * 1024, help='image payload size in bytes')
+	parser.add_argument('--error-rate', type=float, default=0.0)
+	parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+	parser.add_argument('--repeat', action='store_true', help='send identical params every call instead of unique ones')
+	parser.add_argument('--no-memory', action='store_true', help='skip tracemalloc peak memory tracking')
+	parser.add_argument('--import-time', nargs='?', const='jeyyapi', metavar='MODULE', help='measure `import MODULE` instead of requests')
+	parser.add_argument(
+		'--budget', type=float, metavar='MS',
+		help=f'with --import-time, exit non-zero when the best run is slower (default {IMPORT_BUDGET_MS:g} for jeyyapi)'
+	)
+	args = parser.parse_args(argv)
+
+	if args.import_time is not None:
+		if args.budget is None and args.import_time == 'jeyyapi':
+			args.budget = IMPORT_BUDGET_MS
+
+		times = measure_import_time(args.import_time)
+		best = min(times) * 1000
+		print(f'import {args.import_time}: best {best:.1f}ms, median {statistics.median(times) * 1000:.1f}ms over {len(times)} runs')
+		if args.budget is not None and best > args.budget:
+			sys.exit(f'import {args.import_time} took {best:.1f}ms, over the {args.budget:g}ms budget')
+		return
+
+	latency = lognormal(args.latency, args.sigma) if args.sigma > 0 and args.latency > 0 else args.latency
+
+	async def run() -> None:
+		for endpoint in args.endpoints:
+			mock = MockJeyyAPI(
+				latency=latency,
+				payload_size=args.payload,
+				error_rate=args.error_rate,
+				rate_limit_rate=args.rate_limit_rate,
+				retry_after=0.1
+			)
+			results = await run_benchmark(
+				endpoint,
+				concurrency=args.concurrency,
+				requests=args.requests,
+				unique=not args.repeat,
+				trace_memory=not args.no_memory,
+				mock=mock
+			)
+			print(format_results(results))
+
+	asyncio.run(run())
+
+
+if __name__ == '__main__':
+	main()
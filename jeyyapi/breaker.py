@@ -0,0 +1,115 @@
+import asyncio
+import collections
+import time
+import typing
+
+import aiohttp
+
+from .errors import APIError, CircuitOpen
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def is_failure(error: BaseException) -> bool:
+	# the server struggling counts, a bad request or a client-side limit (size, deadline, open circuit) doesn't
+	if isinstance(error, APIError):
+		return error.status is not None and (error.status == 429 or error.status >= 500)
+	return isinstance(error, (aiohttp.ClientError, OSError, asyncio.TimeoutError))
+
+
+class CircuitBreaker:
+	def __init__(
+		self,
+		group: str = 'default',
+		*,
+		error_rate: float = 0.5,
+		slow_call_duration: typing.Optional[float] = None,
+		slow_call_rate: float = 0.8,
+		window: int = 20,
+		min_calls: int = 10,
+		reset_timeout: float = 30.0,
+		half_open_calls: int = 1
+	) -> None:
+		self.group = group
+		self.error_rate = error_rate
+		self.slow_call_duration = slow_call_duration
+		self.slow_call_rate = slow_call_rate
+		self.window = window
+		self.min_calls = min_calls
+		self.reset_timeout = reset_timeout
+		self.half_open_calls = half_open_calls
+		self._outcomes: typing.Deque[typing.Tuple[bool, bool]] = collections.deque(maxlen=window)
+		self._state = CLOSED
+		self._opened_at = 0.0
+		self._probes = 0
+
+	def __repr__(self) -> str:
+		return f'<CircuitBreaker group={self.group!r} state={self.state}>'
+
+	def copy(self, group: str) -> 'CircuitBreaker':
+		return CircuitBreaker(
+			group,
+			error_rate=self.error_rate,
+			slow_call_duration=self.slow_call_duration,
+			slow_call_rate=self.slow_call_rate,
+			window=self.window,
+			min_calls=self.min_calls,
+			reset_timeout=self.reset_timeout,
+			half_open_calls=self.half_open_calls
+		)
+
+	@property
+	def state(self) -> str:
+		if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+			self._state = HALF_OPEN
+			self._probes = 0
+		return self._state
+
+	@property
+	def retry_after(self) -> float:
+		if self.state != OPEN:
+			return 0.0
+		return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+	def acquire(self) -> None:
+		state = self.state
+		if state == CLOSED:
+			return
+		if state == HALF_OPEN and self._probes < self.half_open_calls:
+			self._probes += 1
+			return
+
+		raise CircuitOpen(f'circuit for {self.group!r} endpoints is open', self.group, self.retry_after)
+
+	def release(self) -> None:
+		# a probe that never got an answer, e.g. cancelled
+		if self._state == HALF_OPEN and self._probes > 0:
+			self._probes -= 1
+
+	def record(self, failed: bool, duration: float) -> None:
+		slow = self.slow_call_duration is not None and duration >= self.slow_call_duration
+		if self._state == HALF_OPEN:
+			self._probes = max(0, self._probes - 1)
+			if failed or slow:
+				self._open()
+			else:
+				self._state = CLOSED
+				self._outcomes.clear()
+			return
+
+		self._outcomes.append((failed, slow))
+		if self._state != CLOSED or len(self._outcomes) < self.min_calls:
+			return
+
+		failures = sum(1 for f, _ in self._outcomes if f)
+		slows = sum(1 for _, s in self._outcomes if s)
+		if failures >= self.error_rate * len(self._outcomes) or (self.slow_call_duration is not None and slows >= self.slow_call_rate * len(self._outcomes)):
+			self._open()
+
+	def _open(self) -> None:
+		self._state = OPEN
+		self._opened_at = time.monotonic()
+		self._outcomes.clear()
+		self._probes = 0
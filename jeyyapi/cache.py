@@ -0,0 +1,112 @@
+import time
+import typing
+from collections import OrderedDict
+
+
+def _freeze(value):
+	if isinstance(value, (list, tuple)):
+		return tuple(_freeze(v) for v in value)
+	return value
+
+
+def make_key(endpoint: str, params: typing.Mapping[str, typing.Any]) -> tuple:
+	return (endpoint, tuple(sorted((k, _freeze(v)) for k, v in params.items())))
+
+
+class ResponseCache:
+	def __init__(
+		self,
+		max_bytes: int = 64 * 1024 * 1024,
+		*,
+		ttl: typing.Optional[float] = None,
+		ttls: typing.Optional[typing.Dict[str, float]] = None
+	) -> None:
+		if max_bytes <= 0:
+			raise ValueError('max_bytes must be positive')
+
+		self.max_bytes = max_bytes
+		self.ttl = ttl
+		self.ttls = dict(ttls or {})
+		self.size = 0
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self._entries: 'OrderedDict[tuple, typing.Tuple[bytes, typing.Optional[float]]]' = OrderedDict()
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def __contains__(self, key: tuple) -> bool:
+		return self._lookup(key) is not None
+
+	def _ttl_for(self, endpoint: str) -> typing.Optional[float]:
+		# ttls may be keyed by full path ('image/matrix') or by bare name ('matrix')
+		if endpoint in self.ttls:
+			return self.ttls[endpoint]
+		name = endpoint.rpartition('/')[2]
+		return self.ttls.get(name, self.ttl)
+
+	def _lookup(self, key: tuple) -> typing.Optional[bytes]:
+		entry = self._entries.get(key)
+		if entry is None:
+			return None
+
+		data, expires = entry
+		if expires is not None and expires <= time.monotonic():
+			self._remove(key)
+			return None
+
+		return data
+
+	def _remove(self, key: tuple) -> None:
+		data, _ = self._entries.pop(key)
+		self.size -= len(data)
+
+	def get(self, key: tuple) -> typing.Optional[bytes]:
+		data = self._lookup(key)
+		if data is None:
+			self.misses += 1
+			return None
+
+		self._entries.move_to_end(key)
+		self.hits += 1
+		return data
+
+	def set(self, key: tuple, data: bytes) -> None:
+		data = bytes(data)
+		if len(data) > self.max_bytes:
+			return
+
+		ttl = self._ttl_for(key[0])
+		if ttl is not None and ttl <= 0:
+			return
+
+		if key in self._entries:
+			self._remove(key)
+
+		expires = time.monotonic() + ttl if ttl is not None else None
+		self._entries[key] = (data, expires)
+		self.size += len(data)
+
+		while self.size > self.max_bytes:
+			oldest = next(iter(self._entries))
+			self._remove(oldest)
+			self.evictions += 1
+
+	def invalidate(self, key: tuple) -> None:
+		if key in self._entries:
+			self._remove(key)
+
+	def clear(self) -> None:
+		self._entries.clear()
+		self.size = 0
+
+	def stats(self) -> dict:
+		return {
+			'entries': len(self._entries),
+			'size': self.size,
+			'max_bytes': self.max_bytes,
+			'hits': self.hits,
+			'misses': self.misses,
+			'evictions': self.evictions,
+		}
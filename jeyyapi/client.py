@@ -0,0 +1,919 @@
+import aiohttp
+from aiohttp import FormData
+import asyncio
+import concurrent.futures
+import contextlib
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import math
+import random
+import time
+import typing
+import yarl
+import datetime
+import multiprocessing
+from io import BytesIO
+
+from .batch import BatchResult, run_batch
+from .breaker import OPEN, CircuitBreaker, is_failure
+from .cache import ResponseCache, make_key
+from .endpoints import ENDPOINTS, Endpoint, remote_paths
+from .errors import APIError, CircuitOpen, DeadlineExceeded, RateLimited, ResponseTooLarge
+from .hedging import HedgePolicy
+from .keys import DEFAULT_BASE_URL, KeyPool
+from .metrics import MetricsSink, RequestStats, trace_config
+from .models import JSONResult, Loads, default_loads
+from .postprocess import PostProcess, run as postprocess_run
+from .ratelimit import RateLimiter, parse_retry_after
+from .scheduler import BACKGROUND, INTERACTIVE, Scheduler, check_priority
+from .store import DiskStore
+from .uploads import ImageData, UploadCache, detect_content_type, digest, open_image
+
+if typing.TYPE_CHECKING:
+	# only needed for the spotify_from_object annotation, discord.py is never imported at runtime
+	import discord
+
+
+log = logging.getLogger(__name__)
+
+# (priority, tenant) of the call currently being made, read where the request takes a scheduler slot
+_call_class: 'contextvars.ContextVar[typing.Tuple[str, typing.Hashable]]' = contextvars.ContextVar('jeyyapi_call_class', default=(INTERACTIVE, None))
+# network time of each finished attempt, collected for the circuit breaker's slow call detection
+_attempt_timings: 'contextvars.ContextVar[typing.Optional[typing.List[float]]]' = contextvars.ContextVar('jeyyapi_attempt_timings', default=None)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# statuses that are about the key rather than the request, retried on another key while one is left
+KEY_STATUSES = frozenset({401, 403, 429})
+
+
+def _last(timings: typing.List[float]) -> float:
+	# the attempt that decided the outcome, earlier retries are already behind us
+	return timings[-1] if timings else 0.0
+
+
+class JeyyAPIClient:
+	def __init__(
+		self,
+		api_key: typing.Union[str, typing.Sequence[str]],
+		*,
+		base_urls: typing.Optional[typing.Sequence[typing.Union[str, yarl.URL]]] = None,
+		session: typing.Optional[aiohttp.ClientSession] = None,
+		cache: typing.Optional[ResponseCache] = None,
+		coalesce: bool = True,
+		rate_limit: typing.Optional[RateLimiter] = None,
+		max_retries: int = 3,
+		backoff_base: float = 0.5,
+		backoff_max: float = 30.0,
+		max_response_bytes: typing.Optional[int] = None,
+		limit: int = 100,
+		limit_per_host: int = 0,
+		keepalive_timeout: float = 60.0,
+		dns_cache_ttl: typing.Optional[int] = 300,
+		timeout: typing.Optional[aiohttp.ClientTimeout] = None,
+		sync_endpoints: bool = False,
+		metrics: typing.Optional[MetricsSink] = None,
+		on_request_end: typing.Optional[typing.Callable[[RequestStats], typing.Any]] = None,
+		upload_ttl: typing.Optional[float] = 3600.0,
+		request_timeout: typing.Optional[float] = None,
+		hedge: typing.Optional[HedgePolicy] = None,
+		circuit_breaker: typing.Optional[CircuitBreaker] = None,
+		stale_max_bytes: typing.Optional[int] = None,
+		progress_quantum: typing.Optional[float] = None,
+		prefetch_progress: bool = False,
+		prefetch_lead: float = 1.0,
+		json_loads: typing.Optional[Loads] = None,
+		postprocess_executor: typing.Optional[concurrent.futures.Executor] = None,
+		store: typing.Optional[DiskStore] = None,
+		scheduler: typing.Optional[Scheduler] = None
+	) -> None:
+		api_keys = [api_key] if isinstance(api_key, str) else list(api_key)
+		self.keys = KeyPool(api_keys, base_urls or (DEFAULT_BASE_URL,))
+		self.cache = cache
+		self.store = store
+		self.scheduler = scheduler
+		self.coalesce = coalesce
+		self._inflight: typing.Dict[tuple, asyncio.Future] = {}
+		self.rate_limit = rate_limit
+		self.max_retries = max_retries
+		self.backoff_base = backoff_base
+		self.backoff_max = backoff_max
+		self.max_response_bytes = max_response_bytes
+		self.connector_options = {
+			'limit': limit,
+			'limit_per_host': limit_per_host,
+			'keepalive_timeout': keepalive_timeout,
+			'ttl_dns_cache': dns_cache_ttl,
+			'use_dns_cache': dns_cache_ttl is not None,
+		}
+		# renders of large animated outputs can take a while, but connecting shouldn't
+		self.timeout = timeout or aiohttp.ClientTimeout(total=120, sock_connect=10)
+		self.new_session = session is None
+		self.sync_on_enter = sync_endpoints
+		self.metrics = metrics
+		self.on_request_end = on_request_end
+		# the loop only keeps weak references to tasks, awaitable callbacks are held here until they finish
+		self._callbacks: typing.Set[asyncio.Future] = set()
+		self.uploads = UploadCache(upload_ttl)
+		self.request_timeout = request_timeout
+		self.hedge = hedge
+		# settings template, each endpoint group (image, discord, text, general) gets its own copy
+		self.circuit_breaker = circuit_breaker
+		self.breakers: typing.Dict[str, CircuitBreaker] = {}
+		self.stale = ResponseCache(stale_max_bytes) if stale_max_bytes else None
+		self.progress_quantum = progress_quantum
+		self.prefetch_progress = prefetch_progress
+		self.prefetch_lead = prefetch_lead
+		self._prefetching: typing.Dict[tuple, asyncio.Future] = {}
+		self.json_loads = json_loads or default_loads()
+		# image post-processing is CPU bound, it never runs on the event loop
+		self._executor = postprocess_executor
+		self.new_executor = postprocess_executor is None
+		self._unavailable: typing.FrozenSet[str] = frozenset()
+		self._session = session
+
+	@property
+	def base_url(self) -> yarl.URL:
+		return self.keys.urls[0].url
+
+	@base_url.setter
+	def base_url(self, value: typing.Union[str, yarl.URL]) -> None:
+		self.keys.set_urls([value])
+
+	@property
+	def headers(self) -> typing.Dict[str, str]:
+		return self.keys.keys[0].headers
+
+	@property
+	def session(self) -> aiohttp.ClientSession:
+		# created on first use so the client can be constructed outside a running loop
+		if self._session is None:
+			connector = aiohttp.TCPConnector(**self.connector_options)
+			# phase timings (dns, connect, ttfb) are only available on sessions we create
+			trace_configs = [trace_config()] if self.metrics is not None or self.on_request_end is not None else None
+			self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, trace_configs=trace_configs)
+
+		return self._session
+
+	@property
+	def postprocess_executor(self) -> concurrent.futures.Executor:
+		if self._executor is None:
+			# forking would copy the running event loop and aiohttp's threads into the workers
+			self._executor = concurrent.futures.ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'))
+
+		return self._executor
+
+	async def close(self) -> None:
+		for task in list(self._prefetching.values()):
+			task.cancel()
+
+		if self._callbacks:
+			# errors are already logged by _callback_done
+			await asyncio.gather(*self._callbacks, return_exceptions=True)
+
+		if self.new_executor and self._executor is not None:
+			self._executor.shutdown(wait=False, cancel_futures=True)
+			self._executor = None
+
+		if self.new_session:
+			if self._session is None:
+				return
+
+			if self._session.closed:
+				raise TypeError('session is already closed')
+				
+			await self._session.close()
+		else:
+			raise TypeError('session was created manually. call .close() on the session instead.')
+
+	async def __aenter__(self):
+		if self._session is not None and self._session.closed:
+			raise TypeError('session has closed')
+
+		if self.sync_on_enter:
+			await self.sync_endpoints()
+			
+		return self
+
+	async def warmup(self, n: int = 1) -> None:
+		# bypasses coalescing on purpose, each ping needs its own connection
+		await asyncio.gather(*(self._request('GET', 'general/ping') for _ in range(n)))
+
+	async def __aexit__(self, exc_type, exc, tb):
+		try:
+			await self.close()
+		except:
+			pass
+
+	def _backoff(self, attempt: int) -> float:
+		return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+	@contextlib.asynccontextmanager
+	async def _response(
+		self,
+		method: str,
+		path: str,
+		*,
+		timings: typing.Optional[typing.List[float]] = None,
+		**kwargs
+	) -> typing.AsyncIterator[aiohttp.ClientResponse]:
+		stats = None
+		if self.metrics is not None or self.on_request_end is not None:
+			stats = RequestStats(method, path)
+			if self.metrics is not None:
+				self.metrics.request_started(method, path)
+
+		if timings is None:
+			timings = _attempt_timings.get()
+
+		# only GETs are idempotent, uploads are never retried
+		retries = self.max_retries if method == 'GET' else 0
+		attempt = 0
+		failovers = 0
+		try:
+			while True:
+				# a slot covers one attempt including the body read, never the backoff sleep between attempts
+				async with self._slot():
+					if self.rate_limit is not None:
+						await self.rate_limit.acquire()
+
+					key, base = self.keys.acquire()
+					# timed from here so queueing, rate limiting and backoff never count as server latency
+					started = time.perf_counter()
+					cancelled = False
+					try:
+						try:
+							resp = await self.session.request(
+								method, base.url / path, headers=key.headers, trace_request_ctx=stats, **kwargs
+							)
+						except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+							self.keys.failed(base)
+							# connect / socket read timeouts are ClientConnectionErrors too. a bare TimeoutError is the
+							# session's total timeout, the budget for the whole call, so retrying would only overrun it
+							if attempt >= retries or not isinstance(e, aiohttp.ClientConnectionError):
+								raise
+
+							delay = self._backoff(attempt)
+						else:
+							async with resp:
+								if stats is not None:
+									stats.status = resp.status
+								self.keys.update(key, base, resp.status, resp.headers)
+								if self.rate_limit is not None:
+									self._update_rate_limit(resp)
+
+								if resp.status == 200:
+									yield resp
+									return
+
+								text = await resp.text()
+
+							if resp.status in KEY_STATUSES and failovers < len(self.keys.keys) - 1 and self.keys.available(exclude=key):
+								# this key was refused, the request never ran so another key can take it straight away.
+								# each key gets one go per attempt, after that it's a normal retry with backoff
+								failovers += 1
+								continue
+
+							retry_after = parse_retry_after(resp.headers)
+							if resp.status not in RETRY_STATUSES or attempt >= retries or (retry_after or 0) > self.backoff_max:
+								if resp.status == 429:
+									raise RateLimited(text, retry_after if retry_after is not None else self._backoff(attempt))
+								raise APIError(text, status=resp.status)
+
+							delay = retry_after if retry_after is not None else self._backoff(attempt)
+					except (asyncio.CancelledError, GeneratorExit):
+						# a hedge that lost, or a caller that gave up, says nothing about the server
+						cancelled = True
+						raise
+					finally:
+						self.keys.release(key, base)
+						if timings is not None and not cancelled:
+							timings.append(time.perf_counter() - started)
+
+				attempt += 1
+				failovers = 0
+				await asyncio.sleep(delay)
+		except BaseException as e:
+			if stats is not None:
+				stats.error = e
+			raise
+		finally:
+			if stats is not None:
+				stats.finished = time.perf_counter()
+				self._request_ended(stats)
+
+	def _update_rate_limit(self, resp: aiohttp.ClientResponse) -> None:
+		if len(self.keys.keys) == 1:
+			self.rate_limit.update(resp.status, resp.headers)
+		elif resp.status != 429:
+			# quota headers are per key and tracked by the pool, the shared bucket only adapts its rate
+			self.rate_limit.update(resp.status, {})
+		elif not self.keys.available():
+			# only slow everyone down once no key has quota left
+			self.rate_limit.update(resp.status, resp.headers)
+
+	def _slot(self) -> typing.AsyncContextManager[None]:
+		if self.scheduler is None:
+			return contextlib.nullcontext()
+
+		priority, tenant = _call_class.get()
+		return self.scheduler.slot(priority, tenant)
+
+	@contextlib.contextmanager
+	def _call_as(self, priority: typing.Optional[str], tenant: typing.Hashable) -> typing.Iterator[None]:
+		if priority is None and tenant is None:
+			yield
+			return
+
+		if priority is not None:
+			check_priority(priority)
+		current_priority, current_tenant = _call_class.get()
+		# a context variable reaches the request wherever coalescing or hedging moved it to another task
+		token = _call_class.set((priority or current_priority, tenant if tenant is not None else current_tenant))
+		try:
+			yield
+		finally:
+			_call_class.reset(token)
+
+	def _request_ended(self, stats: RequestStats) -> None:
+		if self.metrics is not None:
+			self.metrics.request_ended(stats)
+
+		if self.on_request_end is not None:
+			result = self.on_request_end(stats)
+			if inspect.isawaitable(result):
+				task = asyncio.ensure_future(result)
+				self._callbacks.add(task)
+				task.add_done_callback(self._callback_done)
+
+	def _callback_done(self, task: asyncio.Future) -> None:
+		self._callbacks.discard(task)
+		if not task.cancelled() and task.exception() is not None:
+			log.error('on_request_end callback failed', exc_info=task.exception())
+
+	async def _iter_body(
+		self,
+		resp: aiohttp.ClientResponse,
+		chunk_size: int,
+		max_bytes: typing.Optional[int]
+	) -> typing.AsyncIterator[bytes]:
+		if max_bytes is not None and resp.content_length is not None and resp.content_length > max_bytes:
+			raise ResponseTooLarge(f'response is {resp.content_length} bytes, limit is {max_bytes}', max_bytes)
+
+		received = 0
+		async for chunk in resp.content.iter_chunked(chunk_size):
+			received += len(chunk)
+			if max_bytes is not None and received > max_bytes:
+				raise ResponseTooLarge(f'response exceeded {max_bytes} bytes', max_bytes)
+			yield chunk
+
+	async def _request(self, method: str, path: str, **kwargs) -> bytes:
+		if self.hedge is None or method != 'GET':
+			return await self._fetch(method, path, **kwargs)
+
+		policy = self.hedge
+		policy.requests += 1
+		delay = policy.delay(path)
+		start = time.perf_counter()
+		primary = asyncio.ensure_future(self._fetch(method, path, **kwargs))
+		tasks = {primary}
+		try:
+			done, _ = await asyncio.wait(tasks, timeout=delay)
+			if not done and policy.allow():
+				# the primary is slower than the usual p-quantile, race a duplicate against it
+				policy.hedged += 1
+				tasks.add(asyncio.ensure_future(self._fetch(method, path, **kwargs)))
+
+			error = None
+			while tasks:
+				done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+				for task in done:
+					if task.exception() is None:
+						if task is not primary:
+							policy.hedge_wins += 1
+						policy.record(path, time.perf_counter() - start)
+						return task.result()
+
+					error = error or task.exception()
+
+			raise error
+		finally:
+			for task in tasks:
+				task.cancel()
+
+	async def _fetch(self, method: str, path: str, **kwargs) -> bytes:
+		async with self._response(method, path, **kwargs) as resp:
+			if self.max_response_bytes is None:
+				return await resp.read()
+
+			chunks = [chunk async for chunk in self._iter_body(resp, 65536, self.max_response_bytes)]
+			return b''.join(chunks)
+
+	async def _coalesced(self, key: tuple, factory: typing.Callable[[], typing.Awaitable]) -> typing.Any:
+		# identical work already in progress is shared; shield so a cancelled
+		# waiter doesn't cancel it for everyone else
+		task = self._inflight.get(key)
+		if task is None:
+			task = asyncio.ensure_future(factory())
+			self._inflight[key] = task
+			task.add_done_callback(functools.partial(self._inflight_done, key))
+
+		return await asyncio.shield(task)
+
+	async def _get(self, path: str, params: typing.Optional[dict] = None, key: typing.Optional[tuple] = None) -> bytes:
+		params = params or {}
+		key = key or make_key(path, params)
+		try:
+			breaker = self._breaker(path)
+			if breaker is not None and breaker.state == OPEN:
+				# fail before touching the event loop machinery at all
+				breaker.acquire()
+
+			if self.coalesce:
+				data = await self._coalesced(('GET',) + key, lambda: self._guarded(path, params))
+			else:
+				data = await self._guarded(path, params)
+		except CircuitOpen:
+			stale = self.stale.get(key) if self.stale is not None else None
+			if stale is None:
+				raise
+			return stale
+
+		if self.stale is not None:
+			self.stale.set(key, data)
+		return data
+
+	def _breaker(self, path: str) -> typing.Optional[CircuitBreaker]:
+		if self.circuit_breaker is None:
+			return None
+
+		group = path.partition('/')[0]
+		breaker = self.breakers.get(group)
+		if breaker is None:
+			breaker = self.breakers[group] = self.circuit_breaker.copy(group)
+		return breaker
+
+	async def _guarded(self, path: str, params: dict) -> bytes:
+		breaker = self._breaker(path)
+		if breaker is None:
+			return await self._request('GET', path, params=params)
+
+		breaker.acquire()
+		with self._timed_attempts() as timings:
+			try:
+				data = await self._request('GET', path, params=params)
+			except asyncio.CancelledError:
+				breaker.release()
+				raise
+			except Exception as e:
+				breaker.record(is_failure(e), _last(timings))
+				raise
+
+		breaker.record(False, _last(timings))
+		return data
+
+	@staticmethod
+	@contextlib.contextmanager
+	def _timed_attempts() -> typing.Iterator[typing.List[float]]:
+		# a list shared by reference, so attempts made in hedged tasks land here too
+		timings: typing.List[float] = []
+		token = _attempt_timings.set(timings)
+		try:
+			yield timings
+		finally:
+			_attempt_timings.reset(token)
+
+	def _inflight_done(self, key: tuple, task: asyncio.Future) -> None:
+		if self._inflight.get(key) is task:
+			del self._inflight[key]
+
+		if not task.cancelled():
+			# mark the exception as retrieved even if every waiter went away
+			task.exception()
+
+	async def _json_get(self, path: str, params: typing.Optional[dict] = None):
+		if path in self._unavailable:
+			raise APIError(f'{path} is not provided by the API')
+
+		return JSONResult(await self._get(path, params), self.json_loads)
+
+	@staticmethod
+	def _stream_path(endpoint: str) -> str:
+		return endpoint if '/' in endpoint else f'image/{endpoint}'
+
+	async def _stream_params(self, endpoint: str, params: dict) -> typing.Tuple[str, dict]:
+		path = self._stream_path(endpoint)
+		if path in self._unavailable:
+			raise APIError(f'{path} is not provided by the API')
+
+		spec = next((known for known in ENDPOINTS if known.path == path), None)
+		if spec is not None:
+			# same validation, conversion and image uploads as the endpoint's own method
+			params = await self._resolve_images(spec, spec.bind((), params))
+		return path, params
+
+	async def stream(
+		self,
+		endpoint: str,
+		*,
+		chunk_size: int = 65536,
+		max_bytes: typing.Optional[int] = None,
+		**params
+	) -> typing.AsyncIterator[bytes]:
+		path, params = await self._stream_params(endpoint, params)
+		breaker = self._breaker(path)
+		if breaker is not None:
+			breaker.acquire()
+
+		# passed explicitly, a context variable set in an async generator would leak into the caller between chunks
+		timings: typing.List[float] = []
+		try:
+			async with self._response('GET', path, params=params, timings=timings) as resp:
+				async for chunk in self._iter_body(resp, chunk_size, max_bytes):
+					yield chunk
+		except Exception as e:
+			if breaker is not None:
+				breaker.record(is_failure(e), _last(timings))
+			raise
+		except BaseException:
+			# cancelled, or the caller stopped iterating early
+			if breaker is not None:
+				breaker.release()
+			raise
+
+		if breaker is not None:
+			breaker.record(False, _last(timings))
+
+	async def save(
+		self,
+		endpoint: str,
+		fp: typing.Union[str, os.PathLike, typing.BinaryIO],
+		*,
+		chunk_size: int = 65536,
+		max_bytes: typing.Optional[int] = None,
+		**params
+	) -> int:
+		if isinstance(fp, (str, os.PathLike)):
+			try:
+				with open(fp, 'wb') as f:
+					return await self.save(endpoint, f, chunk_size=chunk_size, max_bytes=max_bytes, **params)
+			except BaseException:
+				with contextlib.suppress(OSError):
+					os.remove(fp)
+				raise
+
+		written = 0
+		async for chunk in self.stream(endpoint, chunk_size=chunk_size, max_bytes=max_bytes, **params):
+			fp.write(chunk)
+			written += len(chunk)
+
+		return written
+
+	def batch(
+		self,
+		calls: typing.Union[typing.Iterable[typing.Tuple[str, dict]], typing.AsyncIterable[typing.Tuple[str, dict]]],
+		*,
+		concurrency: int = 8,
+		ordered: bool = False,
+		priority: str = BACKGROUND,
+		tenant: typing.Hashable = None
+	) -> typing.AsyncIterator[BatchResult]:
+		return run_batch(self, calls, concurrency=concurrency, ordered=ordered, priority=priority, tenant=tenant)
+
+	def map(
+		self,
+		endpoint: str,
+		kwargs: typing.Union[typing.Iterable[dict], typing.AsyncIterable[dict]],
+		*,
+		concurrency: int = 8,
+		ordered: bool = False,
+		priority: str = BACKGROUND,
+		tenant: typing.Hashable = None
+	) -> typing.AsyncIterator[BatchResult]:
+		if hasattr(kwargs, '__aiter__'):
+			async def calls():
+				async for item in kwargs:
+					yield endpoint, item
+		else:
+			def calls():
+				for item in kwargs:
+					yield endpoint, item
+
+		return run_batch(self, calls(), concurrency=concurrency, ordered=ordered, priority=priority, tenant=tenant)
+
+	@classmethod
+	def register_endpoint(cls, endpoint: Endpoint) -> None:
+		existing = getattr(cls, endpoint.name, None)
+		if existing is not None and getattr(existing, 'endpoint', None) is None:
+			raise ValueError(f'{endpoint.name!r} clashes with an existing JeyyAPIClient attribute')
+
+		if endpoint not in ENDPOINTS:
+			ENDPOINTS.append(endpoint)
+		setattr(cls, endpoint.name, endpoint.method())
+
+	async def sync_endpoints(self) -> typing.Tuple[typing.List[str], typing.List[str]]:
+		remote = remote_paths((await self.endpoints()).data)
+		if not remote:
+			return [], []
+
+		# only judge groups the listing actually covers
+		groups = {path.partition('/')[0] for path in remote}
+		local = {endpoint.path for endpoint in ENDPOINTS if endpoint.path.partition('/')[0] in groups}
+		unsupported = sorted(remote - {endpoint.path for endpoint in ENDPOINTS})
+		unavailable = sorted(local - remote - {'general/ping', 'general/endpoints'})
+		self._unavailable = frozenset(unavailable)
+		return unsupported, unavailable
+
+	def _remaining(self, timeout: typing.Optional[float], deadline: typing.Union[datetime.datetime, float, None]) -> typing.Optional[float]:
+		if timeout is None:
+			timeout = self.request_timeout
+
+		if deadline is not None:
+			if isinstance(deadline, datetime.datetime):
+				deadline = deadline.timestamp()
+			left = deadline - time.time()
+			timeout = left if timeout is None else min(timeout, left)
+
+		return timeout
+
+	async def _with_deadline(
+		self,
+		coro: typing.Awaitable,
+		timeout: typing.Optional[float],
+		deadline: typing.Union[datetime.datetime, float, None]
+	) -> typing.Any:
+		remaining = self._remaining(timeout, deadline)
+		if remaining is None:
+			return await coro
+
+		if remaining <= 0:
+			coro.close()
+			raise DeadlineExceeded('deadline already passed')
+
+		loop = asyncio.get_running_loop()
+		end = loop.time() + remaining
+		try:
+			return await asyncio.wait_for(coro, remaining)
+		except asyncio.TimeoutError:
+			# aiohttp's own timeouts surface as the same exception
+			if loop.time() < end:
+				raise
+			raise DeadlineExceeded(f'request did not finish within {remaining:.3f}s') from None
+
+	async def _dispatch(self, endpoint: Endpoint, params: dict, postprocess: typing.Optional[PostProcess] = None) -> typing.Any:
+		if endpoint.image_params:
+			params = await self._resolve_images(endpoint, params)
+
+		if endpoint.kind == 'image':
+			result = await self._image_fetch(endpoint.path.partition('/')[2], **params)
+			if postprocess is not None:
+				result = BytesIO(await postprocess_run(self.postprocess_executor, result.getbuffer(), postprocess))
+			return result
+		return await self._json_get(endpoint.path, params)
+
+	async def _call_endpoint(
+		self,
+		endpoint: Endpoint,
+		params: dict,
+		*,
+		timeout: typing.Optional[float] = None,
+		deadline: typing.Union[datetime.datetime, float, None] = None,
+		postprocess: typing.Optional[PostProcess] = None,
+		priority: typing.Optional[str] = None,
+		tenant: typing.Hashable = None
+	) -> typing.Any:
+		with self._call_as(priority, tenant):
+			return await self._with_deadline(self._dispatch(endpoint, params, postprocess), timeout, deadline)
+
+	# general
+	async def image_upload(self, image: typing.Union[bytes, bytearray, memoryview], content_type: typing.Optional[str] = None):
+		detected, extension = detect_content_type(image)
+		formdata = FormData()
+		formdata.add_field('image', image, content_type=content_type or detected, filename=f'image.{extension}')
+		data = await self._request('POST', 'general/image_upload', data=formdata)
+		return JSONResult(data, self.json_loads)
+
+	async def _upload(self, value: ImageData) -> str:
+		async with open_image(value) as data:
+			key = digest(data)
+			url = self.uploads.get(key)
+			if url is not None:
+				return url
+
+			async def upload() -> str:
+				# a file gets mapped again here, the caller's mapping may go away if it's cancelled
+				if isinstance(value, os.PathLike):
+					async with open_image(value) as own:
+						result = await self.image_upload(own)
+				else:
+					result = await self.image_upload(data)
+
+				url = result.get('url')
+				if not isinstance(url, str):
+					raise APIError(f'unexpected image_upload response: {result!r}')
+
+				self.uploads.set(key, url)
+				return url
+
+			return await self._coalesced(('UPLOAD', key), upload)
+
+	async def _resolve_images(self, endpoint: Endpoint, params: dict) -> dict:
+		for name in endpoint.image_params:
+			value = params.get(name)
+			if value is not None and not isinstance(value, str):
+				params[name] = await self._upload(value)
+
+		return params
+	
+	# image
+	async def _image_fetch(self, endpoint, **params) -> BytesIO:
+		path = f'image/{endpoint}'
+		if path in self._unavailable:
+			raise APIError(f'{path} is not provided by the API')
+
+		data = await self._cached_get(path, params)
+		buffer = BytesIO(data)
+		return buffer
+
+	async def _cached_get(self, path: str, params: dict, key: typing.Optional[tuple] = None) -> typing.Union[bytes, memoryview]:
+		if self.cache is None and self.store is None:
+			return await self._get(path, params, key)
+
+		key = key or make_key(path, params)
+		if self.cache is not None:
+			data = self.cache.get(key)
+			if data is not None:
+				return data
+
+		loop = asyncio.get_running_loop()
+		if self.store is not None:
+			try:
+				# another process may hold the store lock, keep file work off the loop
+				data = await loop.run_in_executor(None, self.store.get, key)
+			except OSError:
+				data = None
+			if data is not None:
+				if self.cache is not None:
+					self.cache.set(key, data)
+				return data
+
+		data = await self._get(path, params, key)
+		if self.cache is not None:
+			self.cache.set(key, data)
+		if self.store is not None:
+			try:
+				await loop.run_in_executor(None, self.store.set, key, data)
+			except OSError:
+				# a full or read-only disk shouldn't fail a request that already succeeded
+				pass
+		return data
+
+	def _prefetch(self, key: tuple, delay: float, factory: typing.Callable[[], typing.Awaitable]) -> None:
+		if key in self._prefetching or (self.cache is not None and key in self.cache):
+			return
+
+		async def run() -> None:
+			# runs in its own task context, nobody is waiting on a prefetch
+			_call_class.set((BACKGROUND, _call_class.get()[1]))
+			try:
+				await asyncio.sleep(max(0.0, delay))
+				await factory()
+			except Exception:
+				# best effort, the real request will fetch it if this failed
+				pass
+			finally:
+				self._prefetching.pop(key, None)
+
+		self._prefetching[key] = asyncio.ensure_future(run())
+
+	async def _spotify_render(self, params: dict, bucket: int) -> bytes:
+		# cached by progress bucket rather than start time, so listeners of the same track share renders
+		progress = bucket * self.progress_quantum
+		key_params = {k: v for k, v in params.items() if k != 'start_timestamp'}
+		key_params['progress'] = progress
+		key = make_key('discord/spotify', key_params)
+
+		# the leader's start time wins for everyone coalesced onto the same bucket
+		send = dict(params, start_timestamp=time.time() - progress)
+		return await self._cached_get('discord/spotify', send, key)
+
+	# discord
+	async def spotify(
+		self,
+		title: str,
+		cover_url: str,
+		duration: typing.Union[datetime.timedelta, int, float],
+		start: typing.Union[datetime.datetime, float],
+		artists: typing.List[str],
+		*,
+		timeout: typing.Optional[float] = None,
+		deadline: typing.Union[datetime.datetime, float, None] = None,
+		priority: typing.Optional[str] = None,
+		tenant: typing.Hashable = None
+	) -> BytesIO:
+		if isinstance(duration, datetime.timedelta):
+			duration = int(duration.seconds)
+		else:
+			duration = int(duration)
+			
+		if isinstance(start, datetime.datetime):
+			start = float(start.timestamp())
+		else:
+			start = float(start)
+		
+		params = {
+			'title': str(title),
+			'cover_url': str(cover_url),
+			'duration_seconds': duration,
+			'start_timestamp': start,
+			'artists': artists
+		}
+
+		if self.progress_quantum is None:
+			with self._call_as(priority, tenant):
+				data = await self._with_deadline(self._get('discord/spotify', params), timeout, deadline)
+			return BytesIO(data)
+
+		quantum = self.progress_quantum
+		progress = min(max(0.0, time.time() - start), duration)
+		bucket = int(progress // quantum)
+		with self._call_as(priority, tenant):
+			data = await self._with_deadline(self._spotify_render(params, bucket), timeout, deadline)
+
+		if self.prefetch_progress and self.cache is not None and (bucket + 1) * quantum <= duration:
+			next_key = make_key('discord/spotify', dict({k: v for k, v in params.items() if k != 'start_timestamp'}, progress=(bucket + 1) * quantum))
+			delay = start + (bucket + 1) * quantum - time.time() - self.prefetch_lead
+			self._prefetch(next_key, delay, functools.partial(self._spotify_render, params, bucket + 1))
+
+		return BytesIO(data)
+
+	async def spotify_from_object(
+		self,
+		spotify: 'discord.Spotify',
+		*,
+		timeout: typing.Optional[float] = None,
+		deadline: typing.Union[datetime.datetime, float, None] = None,
+		priority: typing.Optional[str] = None,
+		tenant: typing.Hashable = None
+	) -> BytesIO:
+		if spotify.__class__.__name__ != 'Spotify':
+			raise TypeError(f'discord.Spotify is expected, {spotify.__class__.__name__} is passed instead.')
+
+		kwargs = {
+			'title': spotify.title,
+			'cover_url': spotify.album_cover_url,
+			'duration': spotify.duration.seconds,
+			'start': spotify.start.timestamp(),
+			'artists': spotify.artists
+		}
+
+		return await self.spotify(**kwargs, timeout=timeout, deadline=deadline, priority=priority, tenant=tenant)
+
+	async def player(
+		self,
+		title: str,
+		thumbnail_url: str,
+		seconds_played: float,
+		total_seconds: float,
+		line_1: typing.Optional[str],
+		line_2: typing.Optional[str],
+		*,
+		timeout: typing.Optional[float] = None,
+		deadline: typing.Union[datetime.datetime, float, None] = None,
+		priority: typing.Optional[str] = None,
+		tenant: typing.Hashable = None
+	):
+		params = {
+			'title': title,
+			'thumbnail_url': thumbnail_url,
+			'seconds_played': seconds_played,
+			'total_seconds': total_seconds,
+			'line_1': line_1,
+			'line_2': line_2,
+		}
+
+		if self.progress_quantum is None:
+			with self._call_as(priority, tenant):
+				data = await self._with_deadline(self._get('discord/player', params), timeout, deadline)
+			return BytesIO(data)
+
+		quantum = self.progress_quantum
+		params['seconds_played'] = math.floor(float(seconds_played) / quantum) * quantum
+		with self._call_as(priority, tenant):
+			data = await self._with_deadline(self._cached_get('discord/player', params), timeout, deadline)
+
+		next_played = params['seconds_played'] + quantum
+		if self.prefetch_progress and self.cache is not None and next_played <= float(total_seconds):
+			next_params = dict(params, seconds_played=next_played)
+			delay = next_played - float(seconds_played) - self.prefetch_lead
+			self._prefetch(make_key('discord/player', next_params), delay, functools.partial(self._cached_get, 'discord/player', next_params))
+
+		return BytesIO(data)
+
+
+for _endpoint in ENDPOINTS:
+	JeyyAPIClient.register_endpoint(_endpoint)
+
+del _endpoint
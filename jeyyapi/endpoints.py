@@ -0,0 +1,338 @@
+import datetime
+import inspect
+import re
+import typing
+from io import BytesIO
+
+from .models import JSONResult
+from .postprocess import PostProcess
+from .uploads import ImageData, is_image_data
+
+_REQUIRED = inspect.Parameter.empty
+# keyword-only options every endpoint method accepts on top of its API params
+CALL_OPTIONS = (
+	('timeout', typing.Optional[float]),
+	('deadline', typing.Optional[typing.Union[datetime.datetime, float]]),
+	('priority', typing.Optional[str]),
+	('tenant', typing.Hashable),
+)
+# keyword-only options image endpoint methods accept for post-processing the output
+IMAGE_OPTIONS = (
+	('max_bytes', typing.Optional[int]),
+	('max_size', typing.Optional[typing.Union[int, typing.Tuple[int, int]]]),
+	('max_frames', typing.Optional[int]),
+	('format', typing.Optional[str]),
+)
+_PATH_RE = re.compile(r'(?:^|/)((?:image|discord|text|general)/\w+)/?$')
+
+
+class Image:
+	# marker type: an image URL, or raw image data the client uploads first
+	pass
+
+
+class Param:
+	__slots__ = ('name', 'type', 'default', 'choices', '_choices_repr')
+
+	def __init__(self, name: str, type: type = str, default: typing.Any = _REQUIRED, *, choices: typing.Optional[tuple] = None) -> None:
+		self.name = name
+		self.type = type
+		self.default = default
+		self.choices = frozenset(choices) if choices is not None else None
+		self._choices_repr = choices
+
+	@property
+	def required(self) -> bool:
+		return self.default is _REQUIRED
+
+	@property
+	def annotation(self):
+		if self._choices_repr is not None:
+			annotation = typing.Literal[self._choices_repr]
+		elif self.type is list:
+			annotation = typing.List[str]
+		elif self.type is Image:
+			annotation = typing.Union[str, ImageData]
+		else:
+			annotation = self.type
+
+		return typing.Optional[annotation] if self.default is None else annotation
+
+	def convert(self, endpoint: str, value: typing.Any) -> typing.Any:
+		if value is None and self.default is None:
+			return None
+
+		try:
+			if self.type is Image:
+				# raw data passes through untouched, it's uploaded by the client
+				if not is_image_data(value):
+					value = str(value)
+			elif self.type is bool:
+				# the API expects 'True' / 'False'
+				value = str(bool(value))
+			elif self.type is list:
+				if isinstance(value, (str, bytes)):
+					raise TypeError('expected a list of strings')
+				value = [str(v) for v in value]
+			elif self.type is int and isinstance(value, float) and not value.is_integer():
+				raise ValueError('expected an integer')
+			else:
+				value = self.type(value)
+		except (TypeError, ValueError) as e:
+			raise type(e)(f'{endpoint}(): invalid value for {self.name!r}: {e}') from None
+
+		if self.choices is not None and value not in self.choices:
+			choices = ', '.join(map(repr, self._choices_repr))
+			raise ValueError(f'{endpoint}(): {self.name!r} must be one of {choices}, got {value!r}')
+
+		return value
+
+
+class Endpoint:
+	__slots__ = ('path', 'name', 'params', 'kind', 'image_params', '_by_name')
+
+	def __init__(
+		self,
+		path: str,
+		*params: Param,
+		name: typing.Optional[str] = None,
+		kind: str = 'image'
+	) -> None:
+		if kind not in ('image', 'json'):
+			raise ValueError(f'unknown endpoint kind {kind!r}')
+
+		self.path = path
+		self.name = name or path.rpartition('/')[2]
+		self.params = params
+		self.kind = kind
+		self.image_params = tuple(param.name for param in params if param.type is Image)
+		self._by_name = {param.name: param for param in params}
+
+	def __repr__(self) -> str:
+		return f'<Endpoint {self.name!r} path={self.path!r}>'
+
+	def bind(self, args: tuple, kwargs: typing.Mapping[str, typing.Any]) -> dict:
+		if len(args) > len(self.params):
+			raise TypeError(f'{self.name}() takes {len(self.params)} positional arguments but {len(args)} were given')
+
+		values = {param.name: value for param, value in zip(self.params, args)}
+		for key, value in kwargs.items():
+			if key not in self._by_name:
+				raise TypeError(f'{self.name}() got an unexpected keyword argument {key!r}')
+			if key in values:
+				raise TypeError(f'{self.name}() got multiple values for argument {key!r}')
+			values[key] = value
+
+		params = {}
+		for param in self.params:
+			if param.name in values:
+				value = values[param.name]
+			elif param.required:
+				raise TypeError(f'{self.name}() missing required argument: {param.name!r}')
+			else:
+				value = param.default
+
+			value = param.convert(self.name, value)
+			if value is not None:
+				params[param.name] = value
+
+		return params
+
+	def signature(self) -> inspect.Signature:
+		parameters = [inspect.Parameter('self', inspect.Parameter.POSITIONAL_OR_KEYWORD)]
+		for param in self.params:
+			parameters.append(inspect.Parameter(
+				param.name,
+				inspect.Parameter.POSITIONAL_OR_KEYWORD,
+				default=param.default,
+				annotation=param.annotation
+			))
+
+		options = CALL_OPTIONS + IMAGE_OPTIONS if self.kind == 'image' else CALL_OPTIONS
+		for name, annotation in options:
+			parameters.append(inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, default=None, annotation=annotation))
+
+		return inspect.Signature(parameters, return_annotation=BytesIO if self.kind == 'image' else JSONResult)
+
+	def method(self) -> typing.Callable[..., typing.Awaitable]:
+		endpoint = self
+
+		if self.kind == 'image':
+			async def method(
+				client, *args, timeout=None, deadline=None, priority=None, tenant=None,
+				max_bytes=None, max_size=None, max_frames=None, format=None, **kwargs
+			):
+				postprocess = PostProcess.create(max_bytes, max_size, max_frames, format)
+				return await client._call_endpoint(
+					endpoint,
+					endpoint.bind(args, kwargs),
+					timeout=timeout,
+					deadline=deadline,
+					postprocess=postprocess,
+					priority=priority,
+					tenant=tenant
+				)
+		else:
+			async def method(client, *args, timeout=None, deadline=None, priority=None, tenant=None, **kwargs):
+				return await client._call_endpoint(
+					endpoint,
+					endpoint.bind(args, kwargs),
+					timeout=timeout,
+					deadline=deadline,
+					priority=priority,
+					tenant=tenant
+				)
+
+		method.__name__ = method.__qualname__ = self.name
+		method.__signature__ = self.signature()
+		method.endpoint = self
+		return method
+
+
+def remote_paths(data: typing.Any) -> typing.Set[str]:
+	# the listing format isn't part of the API contract, so pick out anything shaped like an endpoint path
+	paths = set()
+	stack = [data]
+	while stack:
+		item = stack.pop()
+		if isinstance(item, dict):
+			stack.extend(item.keys())
+			stack.extend(item.values())
+		elif isinstance(item, (list, tuple)):
+			stack.extend(item)
+		elif isinstance(item, str):
+			match = _PATH_RE.search(item)
+			if match:
+				paths.add(match.group(1))
+
+	return paths
+
+
+def image(path: str, *params: Param, **kwargs) -> Endpoint:
+	return Endpoint(f'image/{path}', Param('image_url', Image), *params, **kwargs)
+
+
+ENDPOINTS: typing.List[Endpoint] = [
+	# general
+	Endpoint('general/ping', kind='json'),
+	Endpoint('general/endpoints', kind='json'),
+	Endpoint('general/plat_nomor', Param('plat'), kind='json'),
+
+	# image
+	image('bevel', Param('level', int, 15)),
+	image('patpat'),
+	image('burn'),
+	image('glitch', Param('level', int, 3)),
+	image('boil', Param('level', int, 2)),
+	image('earthquake', Param('level', int, 3)),
+	image('hearts', Param('rainbow', bool, True)),
+	image('shock'),
+	image('abstract'),
+	image('infinity'),
+	image('bomb'),
+	image('bonks'),
+	image('sob'),
+	image('explicit'),
+	image('blur'),
+	image('lamp'),
+	image('rain'),
+	image('canny'),
+	image('cartoon'),
+	image('layers'),
+	image('radiate'),
+	image('shoot'),
+	image('tv'),
+	image('shear', Param('axis', str, 'X')),
+	image('magnify'),
+	image('print'),
+	image('matrix'),
+	image('sensitive'),
+	image('dilute'),
+	image('dither'),
+	image('pattern'),
+	image('logoff'),
+	image('dilate'),
+	image('fire'),
+	image('fall'),
+	image('fan'),
+	image('flag'),
+	image('melt'),
+	image('contour', Param('rainbow', bool, False)),
+	image('cracks'),
+	image('emojify', Param('size', int, 32), name='im_emojify'),
+	image('endless'),
+	image('bayer'),
+	image('slice'),
+	image('spikes'),
+	image('blocks'),
+	image('phone'),
+	image('laundry'),
+	image('pizza'),
+	image('ripped'),
+	image('cinema'),
+	image('stretch'),
+	image('dots'),
+	image('tunnel', Param('direction', choices=('h', 'horizontal', 'v', 'vertical', 'c', 'circle', 'r', 'rotate'))),
+	image('zonk'),
+	image('knit'),
+	image('plank'),
+	image('shred'),
+	image('liquefy'),
+	image('poly'),
+	image('spin'),
+	image('plates'),
+	image('lsd'),
+	image('lines'),
+	image('ipcam'),
+	image('reflection'),
+	image('stereo'),
+	image('kanye'),
+	image('letters'),
+	image('wiggle'),
+	image('tiles', Param('n_edges', int, 4, choices=(3, 4, 5, 6, 7, 8))),
+	image('gameboy_camera'),
+	image('ripple'),
+	image('globe'),
+	image('cow'),
+	image('pyramid'),
+	image('wall'),
+	image('cube'),
+	image('paint'),
+	image('painting'),
+	image('shine'),
+	image('neon'),
+	image('flush'),
+	Endpoint('image/ace', Param('name'), Param('side', choices=('attorney', 'prosecutor')), Param('text')),
+	image('gallery'),
+	image('paparazzi'),
+	image('balls'),
+	image('equation'),
+	image('half_invert'),
+	image('heart_locket', Param('image_url_2', Image, None)),
+	image('roll'),
+	image('wave', Param('frequency', float, 0.05), Param('amplitude', int, 1, choices=(1, 2, 3, 4, 5))),
+	image('clock'),
+	image('optics'),
+	image('warp'),
+	image('ads'),
+	image('billboard'),
+	image('bubble'),
+	image('cloth'),
+	Endpoint('image/youtube', Param('avatar_url', Image), Param('author'), Param('title')),
+	Endpoint('image/scrapbook', Param('text')),
+	# text
+	Endpoint('text/emojify', Param('image_url', Image), kind='json'),
+
+	# discord
+	Endpoint('discord/wheel', Param('args', list), kind='json'),
+	Endpoint(
+		'discord/ansi',
+		Param('text'),
+		Param('bold', bool, False),
+		Param('underline', bool, False),
+		Param('text_color', str, None, choices=('gray', 'red', 'green', 'yellow', 'blue', 'pink', 'cyan', 'white')),
+		Param('bg_color', str, None, choices=('dark blue', 'orange', 'gray 1', 'gray 2', 'gray 3', 'gray 4', 'indigo', 'white')),
+		Param('codeblock', bool, True),
+		kind='json'
+	),
+]
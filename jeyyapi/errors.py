@@ -0,0 +1,30 @@
+import typing
+
+
+class APIError(Exception):
+	def __init__(self, *args, status: typing.Optional[int] = None) -> None:
+		super().__init__(*args)
+		self.status = status
+
+
+class RateLimited(APIError):
+	def __init__(self, message: str, retry_after: float) -> None:
+		super().__init__(message, status=429)
+		self.retry_after = retry_after
+
+
+class ResponseTooLarge(APIError):
+	def __init__(self, message: str, max_bytes: int) -> None:
+		super().__init__(message)
+		self.max_bytes = max_bytes
+
+
+class DeadlineExceeded(APIError):
+	pass
+
+
+class CircuitOpen(APIError):
+	def __init__(self, message: str, group: str, retry_after: float) -> None:
+		super().__init__(message)
+		self.group = group
+		self.retry_after = retry_after
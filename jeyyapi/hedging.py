@@ -0,0 +1,52 @@
+import collections
+import typing
+
+
+class HedgePolicy:
+	def __init__(
+		self,
+		quantile: float = 0.95,
+		*,
+		budget: float = 0.05,
+		min_delay: float = 0.05,
+		max_delay: typing.Optional[float] = None,
+		window: int = 256,
+		min_samples: int = 20
+	) -> None:
+		if not 0 < quantile < 1:
+			raise ValueError('quantile must be between 0 and 1')
+		if budget < 0:
+			raise ValueError('budget must not be negative')
+
+		self.quantile = quantile
+		self.budget = budget
+		self.min_delay = min_delay
+		self.max_delay = max_delay
+		self.window = window
+		self.min_samples = min_samples
+		self.requests = 0
+		self.hedged = 0
+		self.hedge_wins = 0
+		self._samples: typing.Dict[str, typing.Deque[float]] = {}
+
+	def record(self, endpoint: str, latency: float) -> None:
+		samples = self._samples.get(endpoint)
+		if samples is None:
+			samples = self._samples[endpoint] = collections.deque(maxlen=self.window)
+		samples.append(latency)
+
+	def delay(self, endpoint: str) -> typing.Optional[float]:
+		samples = self._samples.get(endpoint)
+		if samples is None or len(samples) < self.min_samples:
+			return None
+
+		ordered = sorted(samples)
+		delay = max(self.min_delay, ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))])
+		return min(delay, self.max_delay) if self.max_delay is not None else delay
+
+	def allow(self) -> bool:
+		# hedges may add at most `budget` extra requests on top of the primary ones
+		return self.hedged < self.budget * self.requests
+
+	def stats(self) -> dict:
+		return {'requests': self.requests, 'hedged': self.hedged, 'hedge_wins': self.hedge_wins}
@@ -0,0 +1,142 @@
+import time
+import typing
+
+import yarl
+
+from .ratelimit import parse_retry_after
+
+DEFAULT_BASE_URL = 'https://api.jeyy.xyz/v2/'
+
+
+class KeyState:
+	__slots__ = ('api_key', 'headers', 'outstanding', 'requests', 'remaining', 'reset_at', 'sidelined_until')
+
+	def __init__(self, api_key: str) -> None:
+		self.api_key = api_key
+		self.headers = {'Authorization': f'Bearer {api_key}'}
+		self.outstanding = 0
+		self.requests = 0
+		self.remaining: typing.Optional[float] = None
+		self.reset_at: typing.Optional[float] = None
+		self.sidelined_until = 0.0
+
+	def __repr__(self) -> str:
+		return f'<KeyState ...{self.api_key[-4:]} outstanding={self.outstanding} remaining={self.remaining}>'
+
+
+class URLState:
+	__slots__ = ('url', 'outstanding', 'failures', 'sidelined_until')
+
+	def __init__(self, url: typing.Union[str, yarl.URL]) -> None:
+		self.url = yarl.URL(str(url))
+		self.outstanding = 0
+		self.failures = 0
+		self.sidelined_until = 0.0
+
+	def __repr__(self) -> str:
+		return f'<URLState {self.url} outstanding={self.outstanding} failures={self.failures}>'
+
+
+def _pick(states: typing.Sequence, now: float, score: typing.Callable) -> typing.Any:
+	healthy = [state for state in states if state.sidelined_until <= now]
+	if not healthy:
+		# everything is sidelined, use whatever comes back first rather than refusing
+		return min(states, key=lambda state: state.sidelined_until)
+	return max(healthy, key=score)
+
+
+class KeyPool:
+	def __init__(
+		self,
+		api_keys: typing.Sequence[str],
+		base_urls: typing.Sequence[typing.Union[str, yarl.URL]] = (DEFAULT_BASE_URL,),
+		*,
+		sideline: float = 30.0,
+		max_failures: int = 3
+	) -> None:
+		if not api_keys:
+			raise ValueError('at least one API key is required')
+		if not base_urls:
+			raise ValueError('at least one base URL is required')
+
+		self.keys = [KeyState(api_key) for api_key in api_keys]
+		self.urls = [URLState(url) for url in base_urls]
+		self.sideline = sideline
+		self.max_failures = max_failures
+
+	def set_urls(self, base_urls: typing.Sequence[typing.Union[str, yarl.URL]]) -> None:
+		self.urls = [URLState(url) for url in base_urls]
+
+	@staticmethod
+	def _key_score(key: KeyState) -> tuple:
+		# headroom left on the key's quota after what's already on the wire, then fewest outstanding,
+		# then the key that was sidelined longest ago so a key fresh out of a 429 doesn't win every tie
+		if key.remaining is None:
+			return (float('inf'), -key.outstanding, -key.sidelined_until)
+		return (key.remaining - key.outstanding, -key.outstanding, -key.sidelined_until)
+
+	def acquire(self) -> typing.Tuple[KeyState, URLState]:
+		now = time.monotonic()
+		for key in self.keys:
+			if key.reset_at is not None and key.reset_at <= now:
+				key.remaining = None
+				key.reset_at = None
+
+		key = _pick(self.keys, now, self._key_score)
+		url = _pick(self.urls, now, lambda url: (-url.outstanding, -url.failures))
+		key.outstanding += 1
+		key.requests += 1
+		url.outstanding += 1
+		return key, url
+
+	def release(self, key: KeyState, url: URLState) -> None:
+		key.outstanding -= 1
+		url.outstanding -= 1
+
+	def available(self, exclude: typing.Optional[KeyState] = None) -> int:
+		now = time.monotonic()
+		return sum(1 for key in self.keys if key is not exclude and key.sidelined_until <= now)
+
+	def update(self, key: KeyState, url: URLState, status: int, headers: typing.Mapping[str, str]) -> None:
+		now = time.monotonic()
+		reset_after = parse_retry_after(headers)
+
+		remaining = headers.get('X-RateLimit-Remaining')
+		if remaining is not None:
+			try:
+				key.remaining = float(remaining)
+			except ValueError:
+				pass
+			else:
+				if reset_after is not None:
+					key.reset_at = now + reset_after
+				elif key.reset_at is None:
+					key.reset_at = now + self.sideline
+
+		if status == 429:
+			key.remaining = 0
+			key.sidelined_until = now + (reset_after if reset_after is not None else self.sideline)
+		elif status in (401, 403):
+			key.sidelined_until = now + self.sideline * 10
+
+		if status >= 500:
+			self.failed(url)
+		else:
+			url.failures = 0
+
+	def failed(self, url: URLState) -> None:
+		url.failures += 1
+		if url.failures >= self.max_failures:
+			url.sidelined_until = time.monotonic() + self.sideline
+
+	def stats(self) -> typing.List[dict]:
+		return [
+			{
+				'key': f'...{key.api_key[-4:]}',
+				'requests': key.requests,
+				'outstanding': key.outstanding,
+				'remaining': key.remaining,
+				'sidelined': key.sidelined_until > time.monotonic(),
+			}
+			for key in self.keys
+		]
@@ -0,0 +1,233 @@
+import bisect
+import time
+import typing
+
+import aiohttp
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class RequestStats:
+	__slots__ = (
+		'method', 'endpoint', 'status', 'error', 'attempts', 'bytes_received', 'reused_connection',
+		'started', 'sent', 'headers_received', 'finished', 'dns', 'connect',
+		'_dns_start', '_connect_start'
+	)
+
+	def __init__(self, method: str, endpoint: str) -> None:
+		self.method = method
+		self.endpoint = endpoint
+		self.status: typing.Optional[int] = None
+		self.error: typing.Optional[BaseException] = None
+		self.attempts = 0
+		self.bytes_received = 0
+		self.reused_connection = False
+		self.started = time.perf_counter()
+		self.sent: typing.Optional[float] = None
+		self.headers_received: typing.Optional[float] = None
+		self.finished: typing.Optional[float] = None
+		self.dns = 0.0
+		self.connect = 0.0
+		self._dns_start: typing.Optional[float] = None
+		self._connect_start: typing.Optional[float] = None
+
+	def __repr__(self) -> str:
+		return f'<RequestStats {self.method} {self.endpoint} status={self.status} total={self.total:.3f}s>'
+
+	@property
+	def queue(self) -> float:
+		return (self.sent or self.started) - self.started
+
+	@property
+	def ttfb(self) -> typing.Optional[float]:
+		if self.sent is None or self.headers_received is None:
+			return None
+		return self.headers_received - self.sent
+
+	@property
+	def download(self) -> typing.Optional[float]:
+		if self.headers_received is None or self.finished is None:
+			return None
+		return self.finished - self.headers_received
+
+	@property
+	def total(self) -> float:
+		return (self.finished or time.perf_counter()) - self.started
+
+	def phases(self) -> typing.Dict[str, float]:
+		phases = {'queue': self.queue, 'dns': self.dns, 'connect': self.connect, 'total': self.total}
+		if self.ttfb is not None:
+			phases['ttfb'] = self.ttfb
+		if self.download is not None:
+			phases['download'] = self.download
+		return phases
+
+
+async def _on_request_start(session, ctx, params) -> None:
+	stats = ctx.trace_request_ctx
+	if isinstance(stats, RequestStats):
+		stats.sent = time.perf_counter()
+		stats.attempts += 1
+
+
+async def _on_dns_resolvehost_start(session, ctx, params) -> None:
+	stats = ctx.trace_request_ctx
+	if isinstance(stats, RequestStats):
+		stats._dns_start = time.perf_counter()
+
+
+async def _on_dns_resolvehost_end(session, ctx, params) -> None:
+	stats = ctx.trace_request_ctx
+	if isinstance(stats, RequestStats) and stats._dns_start is not None:
+		stats.dns += time.perf_counter() - stats._dns_start
+
+
+async def _on_connection_create_start(session, ctx, params) -> None:
+	stats = ctx.trace_request_ctx
+	if isinstance(stats, RequestStats):
+		stats._connect_start = time.perf_counter()
+
+
+async def _on_connection_create_end(session, ctx, params) -> None:
+	stats = ctx.trace_request_ctx
+	if isinstance(stats, RequestStats) and stats._connect_start is not None:
+		stats.connect += time.perf_counter() - stats._connect_start
+
+
+async def _on_connection_reuseconn(session, ctx, params) -> None:
+	stats = ctx.trace_request_ctx
+	if isinstance(stats, RequestStats):
+		stats.reused_connection = True
+
+
+async def _on_request_end(session, ctx, params) -> None:
+	stats = ctx.trace_request_ctx
+	if isinstance(stats, RequestStats):
+		stats.headers_received = time.perf_counter()
+
+
+async def _on_response_chunk_received(session, ctx, params) -> None:
+	stats = ctx.trace_request_ctx
+	if isinstance(stats, RequestStats):
+		stats.bytes_received += len(params.chunk)
+
+
+def trace_config() -> aiohttp.TraceConfig:
+	config = aiohttp.TraceConfig()
+	config.on_request_start.append(_on_request_start)
+	config.on_dns_resolvehost_start.append(_on_dns_resolvehost_start)
+	config.on_dns_resolvehost_end.append(_on_dns_resolvehost_end)
+	config.on_connection_create_start.append(_on_connection_create_start)
+	config.on_connection_create_end.append(_on_connection_create_end)
+	config.on_connection_reuseconn.append(_on_connection_reuseconn)
+	config.on_request_end.append(_on_request_end)
+	config.on_response_chunk_received.append(_on_response_chunk_received)
+	return config
+
+
+class MetricsSink:
+	def request_started(self, method: str, endpoint: str) -> None:
+		pass
+
+	def request_ended(self, stats: RequestStats) -> None:
+		pass
+
+
+class Histogram:
+	__slots__ = ('buckets', 'counts', 'sum', 'count')
+
+	def __init__(self, buckets: typing.Sequence[float] = DEFAULT_BUCKETS) -> None:
+		self.buckets = tuple(buckets)
+		self.counts = [0] * (len(self.buckets) + 1)
+		self.sum = 0.0
+		self.count = 0
+
+	def observe(self, value: float) -> None:
+		self.counts[bisect.bisect_left(self.buckets, value)] += 1
+		self.sum += value
+		self.count += 1
+
+	def quantile(self, q: float) -> typing.Optional[float]:
+		# upper bound of the bucket holding the q-th observation
+		if not self.count:
+			return None
+
+		rank = q * self.count
+		seen = 0
+		for bound, count in zip(self.buckets, self.counts):
+			seen += count
+			if seen >= rank:
+				return bound
+
+		return float('inf')
+
+
+def _escape(value: str) -> str:
+	return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels: str) -> str:
+	return '{' + ','.join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + '}'
+
+
+class PrometheusMetrics(MetricsSink):
+	def __init__(self, buckets: typing.Sequence[float] = DEFAULT_BUCKETS, *, namespace: str = 'jeyyapi') -> None:
+		self.buckets = tuple(buckets)
+		self.namespace = namespace
+		self.latency: typing.Dict[typing.Tuple[str, str], Histogram] = {}
+		self.responses: typing.Dict[typing.Tuple[str, str], int] = {}
+		self.bytes_received: typing.Dict[str, int] = {}
+		self.in_flight: typing.Dict[str, int] = {}
+
+	def request_started(self, method: str, endpoint: str) -> None:
+		self.in_flight[endpoint] = self.in_flight.get(endpoint, 0) + 1
+
+	def request_ended(self, stats: RequestStats) -> None:
+		endpoint = stats.endpoint
+		self.in_flight[endpoint] = self.in_flight.get(endpoint, 1) - 1
+
+		for phase, value in stats.phases().items():
+			histogram = self.latency.get((endpoint, phase))
+			if histogram is None:
+				histogram = self.latency[(endpoint, phase)] = Histogram(self.buckets)
+			histogram.observe(value)
+
+		status = str(stats.status) if stats.status is not None else 'error'
+		self.responses[(endpoint, status)] = self.responses.get((endpoint, status), 0) + 1
+		self.bytes_received[endpoint] = self.bytes_received.get(endpoint, 0) + stats.bytes_received
+
+	def quantile(self, endpoint: str, q: float, phase: str = 'total') -> typing.Optional[float]:
+		histogram = self.latency.get((endpoint, phase))
+		return histogram.quantile(q) if histogram is not None else None
+
+	def render(self) -> str:
+		ns = self.namespace
+		lines = [
+			f'# HELP {ns}_request_duration_seconds Request latency by endpoint and phase.',
+			f'# TYPE {ns}_request_duration_seconds histogram',
+		]
+		for (endpoint, phase), histogram in sorted(self.latency.items()):
+			cumulative = 0
+			for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+				cumulative += count
+				le = '+Inf' if bound == float('inf') else repr(bound)
+				lines.append(f'{ns}_request_duration_seconds_bucket{_labels(endpoint=endpoint, phase=phase, le=le)} {cumulative}')
+			lines.append(f'{ns}_request_duration_seconds_sum{_labels(endpoint=endpoint, phase=phase)} {histogram.sum}')
+			lines.append(f'{ns}_request_duration_seconds_count{_labels(endpoint=endpoint, phase=phase)} {histogram.count}')
+
+		lines.append(f'# HELP {ns}_responses_total Responses by endpoint and status code.')
+		lines.append(f'# TYPE {ns}_responses_total counter')
+		for (endpoint, status), count in sorted(self.responses.items()):
+			lines.append(f'{ns}_responses_total{_labels(endpoint=endpoint, status=status)} {count}')
+
+		lines.append(f'# HELP {ns}_response_bytes_total Response body bytes received by endpoint.')
+		lines.append(f'# TYPE {ns}_response_bytes_total counter')
+		for endpoint, count in sorted(self.bytes_received.items()):
+			lines.append(f'{ns}_response_bytes_total{_labels(endpoint=endpoint)} {count}')
+
+		lines.append(f'# HELP {ns}_requests_in_flight Requests currently in flight by endpoint.')
+		lines.append(f'# TYPE {ns}_requests_in_flight gauge')
+		for endpoint, count in sorted(self.in_flight.items()):
+			lines.append(f'{ns}_requests_in_flight{_labels(endpoint=endpoint)} {count}')
+
+		return '\n'.join(lines) + '\n'
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import math
+import random
+import typing
+
+from aiohttp import web
+
+from .endpoints import ENDPOINTS
+
+Latency = typing.Union[float, typing.Callable[[], float]]
+PayloadSize = typing.Union[int, typing.Mapping[str, int], typing.Callable[[str], int]]
+
+
+def lognormal(median: float, sigma: float = 0.5) -> typing.Callable[[], float]:
+	# long right tail, like real render times
+	mu = math.log(median)
+	return lambda: random.lognormvariate(mu, sigma)
+
+
+def uniform(low: float, high: float) -> typing.Callable[[], float]:
+	return lambda: random.uniform(low, high)
+
+
+class MockJeyyAPI:
+	def __init__(
+		self,
+		*,
+		latency: Latency = 0.0,
+		payload_size: PayloadSize = 64 * 1024,
+		error_rate: float = 0.0,
+		rate_limit_rate: float = 0.0,
+		retry_after: float = 1.0
+	) -> None:
+		self.latency = latency
+		self.payload_size = payload_size
+		self.error_rate = error_rate
+		self.rate_limit_rate = rate_limit_rate
+		self.retry_after = retry_after
+		self.requests: typing.Dict[str, int] = {}
+		self.base_url: typing.Optional[str] = None
+		self._json_paths = {endpoint.path for endpoint in ENDPOINTS if endpoint.kind == 'json'}
+		self._payloads: typing.Dict[int, bytes] = {}
+		self._runner: typing.Optional[web.AppRunner] = None
+
+		self.app = web.Application()
+		self.app.router.add_route('*', '/v2/{group:image|discord|text|general}/{name}', self._handle)
+
+	async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+		self._runner = web.AppRunner(self.app, access_log=None)
+		await self._runner.setup()
+		site = web.TCPSite(self._runner, host, port)
+		await site.start()
+		port = site._server.sockets[0].getsockname()[1]
+		self.base_url = f'http://{host}:{port}/v2/'
+		return self.base_url
+
+	async def close(self) -> None:
+		if self._runner is not None:
+			await self._runner.cleanup()
+			self._runner = None
+
+	async def __aenter__(self) -> 'MockJeyyAPI':
+		await self.start()
+		return self
+
+	async def __aexit__(self, exc_type, exc, tb) -> None:
+		await self.close()
+
+	def _delay(self) -> float:
+		return self.latency() if callable(self.latency) else self.latency
+
+	def _size(self, path: str) -> int:
+		if callable(self.payload_size):
+			return self.payload_size(path)
+		if isinstance(self.payload_size, int):
+			return self.payload_size
+		return self.payload_size.get(path, self.payload_size.get(path.rpartition('/')[2], 64 * 1024))
+
+	def _payload(self, size: int) -> bytes:
+		payload = self._payloads.get(size)
+		if payload is None:
+			header = b'GIF89a'
+			payload = self._payloads[size] = header + bytes(max(0, size - len(header)))
+		return payload
+
+	def _json(self, path: str, request: web.Request) -> typing.Any:
+		if path == 'general/ping':
+			return {'message': 'pong'}
+		if path == 'general/endpoints':
+			return [f'/v2/{endpoint.path}' for endpoint in ENDPOINTS]
+		if path == 'general/image_upload':
+			return {'url': f'{self.base_url}uploads/{random.getrandbits(64):016x}.gif'}
+		if path == 'discord/ansi':
+			return {'ansi': request.query.get('text', '')}
+		return {'path': path, 'params': dict(request.query)}
+
+	async def _handle(self, request: web.Request) -> web.Response:
+		path = f"{request.match_info['group']}/{request.match_info['name']}"
+		self.requests[path] = self.requests.get(path, 0) + 1
+		if request.can_read_body:
+			await request.read()
+
+		delay = self._delay()
+		if delay > 0:
+			await asyncio.sleep(delay)
+
+		roll = random.random()
+		if roll < self.rate_limit_rate:
+			return web.Response(status=429, text='rate limited', headers={'Retry-After': str(self.retry_after)})
+		if roll < self.rate_limit_rate + self.error_rate:
+			return web.Response(status=500, text='internal server error')
+
+		if path in self._json_paths or path == 'general/image_upload':
+			return web.Response(body=json.dumps(self._json(path, request)).encode(), content_type='application/json')
+
+		content_type = 'image/png' if request.match_info['group'] == 'discord' else 'image/gif'
+		return web.Response(body=self._payload(self._size(path)), content_type=content_type)
@@ -0,0 +1,110 @@
+import collections.abc
+import json
+import typing
+
+Loads = typing.Callable[[typing.Union[bytes, str]], typing.Any]
+
+
+def default_loads() -> Loads:
+	# imported on first use, not when jeyyapi is
+	try:
+		import orjson
+	except ImportError:
+		pass
+	else:
+		return orjson.loads
+
+	try:
+		import msgspec.json
+	except ImportError:
+		pass
+	else:
+		return msgspec.json.decode
+
+	return json.loads
+
+
+class JSONResult(collections.abc.Mapping):
+	# keeps the raw body and decodes on first access, so results that are
+	# passed along untouched never pay for parsing. the Mapping interface
+	# only makes sense for object payloads, lists and scalars go through .data
+	__slots__ = ('_raw', '_loads', '_data')
+
+	# compares equal to the decoded value, which is usually an unhashable dict
+	__hash__ = None
+
+	def __init__(self, raw: bytes, loads: Loads = json.loads) -> None:
+		self._raw = raw
+		self._loads = loads
+		self._data = None
+
+	def __repr__(self) -> str:
+		return repr(self.data)
+
+	@property
+	def raw(self) -> typing.Optional[bytes]:
+		return self._raw
+
+	@property
+	def data(self) -> typing.Any:
+		if self._raw is not None:
+			self._data = self._loads(self._raw)
+			self._raw = None
+		return self._data
+
+	def __reduce__(self) -> tuple:
+		# copies and pickles carry the decoded value, the decoder itself may not be picklable
+		return _decoded, (self.data,)
+
+	def __getattr__(self, name: str) -> typing.Any:
+		# private names are never JSON keys, and looking them up through data would recurse
+		# on instances whose slots aren't set yet (copy / unpickle)
+		if name.startswith('_'):
+			raise AttributeError(name)
+
+		data = self.data
+		if isinstance(data, dict) and name in data:
+			return data[name]
+		raise AttributeError(name)
+
+	def __getitem__(self, key):
+		return self.data[key]
+
+	def __contains__(self, key) -> bool:
+		return key in self.data
+
+	def __iter__(self) -> typing.Iterator:
+		return iter(self.data)
+
+	def __len__(self) -> int:
+		return len(self.data)
+
+	def __eq__(self, other) -> bool:
+		if isinstance(other, JSONResult):
+			other = other.data
+		return self.data == other
+
+	def __bool__(self) -> bool:
+		return bool(self.data)
+
+	def get(self, key, default=None):
+		data = self.data
+		return data.get(key, default) if isinstance(data, dict) else default
+
+	def keys(self):
+		return self.data.keys()
+
+	def values(self):
+		return self.data.values()
+
+	def items(self):
+		return self.data.items()
+
+	def to_dict(self) -> typing.Any:
+		return self.data
+
+
+def _decoded(data: typing.Any) -> JSONResult:
+	result = JSONResult(None)
+	result._data = data
+	return result
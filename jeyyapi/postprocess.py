@@ -0,0 +1,174 @@
+import asyncio
+import concurrent.futures
+import io
+import math
+import typing
+from multiprocessing import shared_memory
+
+from .errors import ResponseTooLarge
+
+Size = typing.Union[int, typing.Tuple[int, int]]
+
+FORMATS = ('gif', 'webp', 'png', 'jpeg')
+
+
+class PostProcess(typing.NamedTuple):
+	max_bytes: typing.Optional[int] = None
+	max_size: typing.Optional[typing.Tuple[int, int]] = None
+	max_frames: typing.Optional[int] = None
+	format: typing.Optional[str] = None
+
+	@classmethod
+	def create(
+		cls,
+		max_bytes: typing.Optional[int] = None,
+		max_size: typing.Optional[Size] = None,
+		max_frames: typing.Optional[int] = None,
+		format: typing.Optional[str] = None
+	) -> typing.Optional['PostProcess']:
+		if max_bytes is None and max_size is None and max_frames is None and format is None:
+			return None
+
+		if format is not None:
+			format = format.lower()
+			if format == 'jpg':
+				format = 'jpeg'
+			if format not in FORMATS:
+				raise ValueError(f"format must be one of {', '.join(map(repr, FORMATS))}, got {format!r}")
+		if isinstance(max_size, int):
+			max_size = (max_size, max_size)
+		if max_size is not None and (len(max_size) != 2 or min(max_size) < 1):
+			raise ValueError('max_size must be a positive int or a (width, height) pair')
+		if max_frames is not None and max_frames < 1:
+			raise ValueError('max_frames must be at least 1')
+		if max_bytes is not None and max_bytes < 1:
+			raise ValueError('max_bytes must be positive')
+
+		return cls(max_bytes, tuple(max_size) if max_size is not None else None, max_frames, format)
+
+
+def _encode(frames: list, durations: list, scale: float, format: str, loop: int) -> bytes:
+	from PIL import Image
+
+	if scale < 1:
+		width, height = frames[0].size
+		size = (max(1, int(width * scale)), max(1, int(height * scale)))
+		frames = [frame.resize(size, Image.LANCZOS) for frame in frames]
+
+	if format == 'jpeg' and frames[0].mode not in ('RGB', 'L'):
+		frames = [frames[0].convert('RGB')]
+
+	out = io.BytesIO()
+	options = {'format': format.upper()}
+	if len(frames) > 1 and format in ('gif', 'webp', 'png'):
+		options.update(save_all=True, append_images=frames[1:], duration=durations, loop=loop)
+	if format == 'gif':
+		options['optimize'] = True
+	elif format in ('webp', 'jpeg'):
+		options['quality'] = 80
+	frames[0].save(out, **options)
+	return out.getvalue()
+
+
+def transform(data: typing.Union[bytes, memoryview], options: PostProcess, attempts: int = 8) -> bytes:
+	# best effort: after `attempts` re-encodes the smallest output is returned even if it's still over max_bytes
+	from PIL import Image, ImageSequence
+
+	image = Image.open(io.BytesIO(data))
+	source_format = (image.format or 'png').lower()
+	# without format= the output keeps the source's, only formats Pillow can't write back fall back to png
+	format = options.format or (source_format if source_format in FORMATS else 'png')
+	frames = [frame.copy() for frame in ImageSequence.Iterator(image)]
+	frame_count = len(frames)
+	durations = [frame.info.get('duration', image.info.get('duration', 50)) for frame in frames]
+	loop = image.info.get('loop', 0)
+
+	if options.max_frames is not None and len(frames) > options.max_frames:
+		# keep every nth frame and fold the dropped frames' time into it so playback speed holds
+		step = math.ceil(len(frames) / options.max_frames)
+		durations = [sum(durations[i:i + step]) for i in range(0, len(frames), step)]
+		frames = frames[::step]
+
+	scale = 1.0
+	if options.max_size is not None:
+		width, height = frames[0].size
+		scale = min(1.0, options.max_size[0] / width, options.max_size[1] / height)
+
+	unchanged = scale == 1.0 and len(frames) == frame_count and format == source_format
+	if unchanged and (options.max_bytes is None or len(data) <= options.max_bytes):
+		return bytes(data)
+
+	out = _encode(frames, durations, scale, format, loop)
+	for _ in range(attempts):
+		if options.max_bytes is None or len(out) <= options.max_bytes:
+			break
+		# pixel count scales roughly with bytes, so shrink each side by the square root of the overshoot
+		scale *= max(0.5, min(0.9, math.sqrt(options.max_bytes / len(out))))
+		out = _encode(frames, durations, scale, format, loop)
+
+	return out
+
+
+def _worker(name: str, size: int, options: PostProcess) -> typing.Tuple[str, int]:
+	source = shared_memory.SharedMemory(name=name)
+	try:
+		# the view has to be released before close(), or a failing transform's traceback keeps it exported
+		with source.buf[:size] as view:
+			out = transform(view, options)
+	finally:
+		source.close()
+
+	result = shared_memory.SharedMemory(create=True, size=max(1, len(out)))
+	result.buf[:len(out)] = out
+	name = result.name
+	result.close()
+	return name, len(out)
+
+
+def _unlink(name: str) -> None:
+	try:
+		segment = shared_memory.SharedMemory(name=name)
+	except FileNotFoundError:
+		return
+	segment.close()
+	segment.unlink()
+
+
+def _discard(source: shared_memory.SharedMemory, future: asyncio.Future) -> None:
+	source.close()
+	source.unlink()
+	if not future.cancelled() and future.exception() is None:
+		_unlink(future.result()[0])
+
+
+async def run(executor: concurrent.futures.Executor, data: bytes, options: PostProcess) -> bytes:
+	# the image crosses the process boundary through shared memory instead of being pickled both ways
+	source = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+	source.buf[:len(data)] = data
+	future = asyncio.get_running_loop().run_in_executor(executor, _worker, source.name, len(data), options)
+	try:
+		name, size = await asyncio.shield(future)
+	except asyncio.CancelledError:
+		# the worker may still be reading the input, clean up once it's done
+		future.add_done_callback(lambda f: _discard(source, f))
+		raise
+	except BaseException:
+		source.close()
+		source.unlink()
+		raise
+
+	source.close()
+	source.unlink()
+
+	result = shared_memory.SharedMemory(name=name)
+	try:
+		with result.buf[:size] as view:
+			out = bytes(view)
+	finally:
+		result.close()
+		result.unlink()
+
+	if options.max_bytes is not None and len(out) > options.max_bytes:
+		# transform is best effort, callers asking for max_bytes get an error rather than a file that won't fit
+		raise ResponseTooLarge(f'could not shrink the image below {options.max_bytes} bytes, got {len(out)}', options.max_bytes)
+	return out
@@ -0,0 +1,95 @@
+import asyncio
+import datetime
+import email.utils
+import time
+import typing
+
+
+def parse_retry_after(headers: typing.Mapping[str, str]) -> typing.Optional[float]:
+	value = headers.get('Retry-After')
+	if value is None:
+		value = headers.get('X-RateLimit-Reset-After')
+	if value is None:
+		return None
+
+	try:
+		return max(0.0, float(value))
+	except ValueError:
+		pass
+
+	try:
+		when = email.utils.parsedate_to_datetime(value)
+	except (TypeError, ValueError):
+		return None
+
+	if when.tzinfo is None:
+		when = when.replace(tzinfo=datetime.timezone.utc)
+	return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+class RateLimiter:
+	def __init__(self, rate: float, burst: int = 1, *, min_rate: typing.Optional[float] = None) -> None:
+		if rate <= 0:
+			raise ValueError('rate must be positive')
+		if burst < 1:
+			raise ValueError('burst must be at least 1')
+
+		self.max_rate = float(rate)
+		self.min_rate = float(min_rate) if min_rate is not None else self.max_rate / 16
+		self.rate = self.max_rate
+		self.burst = burst
+		self._tokens = float(burst)
+		self._updated = time.monotonic()
+		self._blocked_until = 0.0
+		self._lock = asyncio.Lock()
+
+	def _refill(self, now: float) -> None:
+		self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+		self._updated = now
+
+	async def acquire(self) -> None:
+		async with self._lock:
+			while True:
+				now = time.monotonic()
+				if now < self._blocked_until:
+					await asyncio.sleep(self._blocked_until - now)
+					continue
+
+				self._refill(now)
+				if self._tokens >= 1:
+					self._tokens -= 1
+					return
+
+				await asyncio.sleep((1 - self._tokens) / self.rate)
+
+	def block(self, delay: float) -> None:
+		now = time.monotonic()
+		self._refill(now)
+		self._tokens = 0.0
+		self._blocked_until = max(self._blocked_until, now + delay)
+
+	def update(self, status: int, headers: typing.Mapping[str, str]) -> None:
+		# additive increase on success, multiplicative decrease when the server pushes back
+		if status == 429:
+			self.rate = max(self.min_rate, self.rate / 2)
+			retry_after = parse_retry_after(headers)
+			if retry_after is not None:
+				self.block(retry_after)
+		elif status < 500:
+			self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+		remaining = headers.get('X-RateLimit-Remaining')
+		if remaining is None:
+			return
+
+		try:
+			remaining = float(remaining)
+		except ValueError:
+			return
+
+		self._refill(time.monotonic())
+		self._tokens = min(self._tokens, remaining)
+		if remaining <= 0:
+			reset_after = parse_retry_after(headers)
+			if reset_after is not None:
+				self.block(reset_after)
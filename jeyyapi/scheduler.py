@@ -0,0 +1,134 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+import typing
+
+from .metrics import Histogram
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+# queue waits are much shorter than request latencies, so the buckets start lower
+WAIT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def check_priority(priority: str) -> str:
+	if priority not in PRIORITIES:
+		raise ValueError(f"priority must be one of {', '.join(map(repr, PRIORITIES))}, got {priority!r}")
+	return priority
+
+
+class _Class:
+	__slots__ = ('queue', 'virtual_time', 'finish', 'waits', 'granted')
+
+	def __init__(self) -> None:
+		self.queue: typing.List[tuple] = []
+		# self-clocked fair queuing: virtual time is the finish tag of the last request let through
+		self.virtual_time = 0.0
+		self.finish: typing.Dict[typing.Hashable, float] = {}
+		self.waits = Histogram(WAIT_BUCKETS)
+		self.granted = 0
+
+
+class Scheduler:
+	def __init__(
+		self,
+		concurrency: int = 32,
+		*,
+		weights: typing.Optional[typing.Mapping[typing.Hashable, float]] = None,
+		default_weight: float = 1.0
+	) -> None:
+		if concurrency < 1:
+			raise ValueError('concurrency must be at least 1')
+		if default_weight <= 0 or any(weight <= 0 for weight in (weights or {}).values()):
+			raise ValueError('weights must be positive')
+
+		self.concurrency = concurrency
+		self.weights = dict(weights or {})
+		self.default_weight = default_weight
+		self.active = 0
+		self._classes = {priority: _Class() for priority in PRIORITIES}
+		self._sequence = itertools.count()
+
+	def __repr__(self) -> str:
+		return f'<Scheduler active={self.active}/{self.concurrency} queued={self.queued()}>'
+
+	def queued(self, priority: typing.Optional[str] = None) -> int:
+		classes = [self._classes[check_priority(priority)]] if priority is not None else self._classes.values()
+		return sum(1 for cls in classes for entry in cls.queue if not entry[3].done())
+
+	def _weight(self, tenant: typing.Hashable) -> float:
+		return self.weights.get(tenant, self.default_weight)
+
+	def _grant(self) -> None:
+		# interactive work always goes first, background only gets slots nobody interactive is waiting for
+		for priority in PRIORITIES:
+			cls = self._classes[priority]
+			while cls.queue and self.active < self.concurrency:
+				finish, _, enqueued, waiter = heapq.heappop(cls.queue)
+				if waiter.done():
+					continue
+
+				cls.virtual_time = finish
+				cls.waits.observe(time.monotonic() - enqueued)
+				cls.granted += 1
+				self.active += 1
+				waiter.set_result(None)
+
+		for cls in self._classes.values():
+			if not cls.queue:
+				# nothing queued means every tag is behind virtual_time already, drop them so the dict can't grow forever
+				cls.finish.clear()
+
+	async def acquire(self, priority: str = INTERACTIVE, tenant: typing.Hashable = None) -> None:
+		cls = self._classes[check_priority(priority)]
+		start = max(cls.virtual_time, cls.finish.get(tenant, 0.0))
+		finish = cls.finish[tenant] = start + 1.0 / self._weight(tenant)
+		waiter = asyncio.get_running_loop().create_future()
+		heapq.heappush(cls.queue, (finish, next(self._sequence), time.monotonic(), waiter))
+		if self.active < self.concurrency:
+			self._grant()
+			if waiter.done():
+				return
+
+		try:
+			await waiter
+		except asyncio.CancelledError:
+			if waiter.done() and not waiter.cancelled():
+				# granted just as we were cancelled, hand the slot to the next in line
+				self.release()
+			raise
+
+	def release(self) -> None:
+		self.active -= 1
+		self._grant()
+
+	@contextlib.asynccontextmanager
+	async def slot(self, priority: str = INTERACTIVE, tenant: typing.Hashable = None) -> typing.AsyncIterator[None]:
+		await self.acquire(priority, tenant)
+		try:
+			yield
+		finally:
+			self.release()
+
+	def stats(self) -> dict:
+		classes = {}
+		for priority, cls in self._classes.items():
+			classes[priority] = {
+				'queued': self.queued(priority),
+				'granted': cls.granted,
+				'wait_mean': cls.waits.sum / cls.waits.count if cls.waits.count else None,
+				'wait_p50': cls.waits.quantile(0.5),
+				'wait_p95': cls.waits.quantile(0.95),
+				'wait_p99': cls.waits.quantile(0.99),
+			}
+
+		return {
+			'active': self.active,
+			'concurrency': self.concurrency,
+			'queued': self.queued(),
+			'classes': classes,
+		}
@@ -0,0 +1,265 @@
+import contextlib
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import time
+import typing
+
+try:
+	import fcntl
+except ImportError:
+	# no advisory locks (windows), eviction bookkeeping is then best effort across processes
+	fcntl = None
+
+# magic, expiry as a unix timestamp (0 for none), payload length
+_HEADER = struct.Struct('<4sdQ')
+_MAGIC = b'JYS1'
+
+
+def digest_key(key: tuple) -> str:
+	# keys only hold str / int / float / bool / None and tuples of them, so repr is stable across processes
+	return hashlib.sha256(repr(key).encode()).hexdigest()
+
+
+class DiskStore:
+	def __init__(
+		self,
+		directory: typing.Union[str, os.PathLike],
+		max_bytes: int = 1024 * 1024 * 1024,
+		*,
+		ttl: typing.Optional[float] = None,
+		ttls: typing.Optional[typing.Dict[str, float]] = None,
+		low_water: float = 0.9
+	) -> None:
+		if max_bytes <= 0:
+			raise ValueError('max_bytes must be positive')
+		if not 0 < low_water <= 1:
+			raise ValueError('low_water must be in (0, 1]')
+
+		self.directory = os.fspath(directory)
+		self.max_bytes = max_bytes
+		self.ttl = ttl
+		self.ttls = dict(ttls or {})
+		self.low_water = low_water
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+		self._objects = os.path.join(self.directory, 'objects')
+		self._tmp = os.path.join(self.directory, 'tmp')
+		self._lock_path = os.path.join(self.directory, 'lock')
+		self._size_path = os.path.join(self.directory, 'size')
+		os.makedirs(self._objects, exist_ok=True)
+		os.makedirs(self._tmp, exist_ok=True)
+		self._sweep_tmp()
+
+	def __repr__(self) -> str:
+		return f'<DiskStore {self.directory!r} max_bytes={self.max_bytes}>'
+
+	def __contains__(self, key: tuple) -> bool:
+		path = self._path(key)
+		try:
+			with open(path, 'rb') as f:
+				header = f.read(_HEADER.size)
+		except FileNotFoundError:
+			return False
+
+		return self._valid(header, os.path.getsize(path)) is not None
+
+	def _sweep_tmp(self, max_age: float = 3600.0) -> None:
+		# leftovers from processes that died mid-write
+		cutoff = time.time() - max_age
+		for entry in os.scandir(self._tmp):
+			with contextlib.suppress(FileNotFoundError):
+				if entry.stat().st_mtime < cutoff:
+					os.unlink(entry.path)
+
+	def _ttl_for(self, endpoint: str) -> typing.Optional[float]:
+		if endpoint in self.ttls:
+			return self.ttls[endpoint]
+		name = endpoint.rpartition('/')[2]
+		return self.ttls.get(name, self.ttl)
+
+	def _path(self, key: tuple) -> str:
+		name = digest_key(key)
+		return os.path.join(self._objects, name[:2], name)
+
+	def _valid(self, header: bytes, file_size: int) -> typing.Optional[int]:
+		if len(header) < _HEADER.size:
+			return None
+
+		magic, expires, length = _HEADER.unpack(header)
+		if magic != _MAGIC or file_size != _HEADER.size + length:
+			return None
+		if expires and expires <= time.time():
+			return None
+
+		return length
+
+	@contextlib.contextmanager
+	def _locked(self) -> typing.Iterator[None]:
+		# one host-wide lock serializes size bookkeeping and eviction, readers never take it
+		with open(self._lock_path, 'a+b') as f:
+			if fcntl is not None:
+				fcntl.flock(f, fcntl.LOCK_EX)
+			try:
+				yield
+			finally:
+				if fcntl is not None:
+					fcntl.flock(f, fcntl.LOCK_UN)
+
+	def _read_size(self) -> typing.Optional[int]:
+		try:
+			with open(self._size_path, 'rb') as f:
+				return int(f.read() or b'0')
+		except (FileNotFoundError, ValueError):
+			return None
+
+	def _write_size(self, size: int) -> None:
+		fd, tmp = tempfile.mkstemp(dir=self._tmp)
+		with os.fdopen(fd, 'wb') as f:
+			f.write(str(max(0, size)).encode())
+		os.replace(tmp, self._size_path)
+
+	def _scan(self) -> typing.List[typing.Tuple[float, int, str]]:
+		entries = []
+		for entry in os.scandir(self._objects):
+			if not entry.is_dir():
+				continue
+			for item in os.scandir(entry.path):
+				try:
+					stat = item.stat()
+				except FileNotFoundError:
+					continue
+				entries.append((stat.st_mtime, stat.st_size, item.path))
+		return entries
+
+	def _evict(self) -> int:
+		entries = self._scan()
+		size = sum(entry[1] for entry in entries)
+		target = int(self.max_bytes * self.low_water)
+		# mtime is bumped on every hit, so oldest mtime is least recently used
+		for _, file_size, path in sorted(entries):
+			if size <= target:
+				break
+			with contextlib.suppress(FileNotFoundError):
+				os.unlink(path)
+				self.evictions += 1
+			size -= file_size
+		return size
+
+	def _discard(self, path: str, stale: os.stat_result) -> None:
+		with self._locked():
+			try:
+				current = os.stat(path)
+			except FileNotFoundError:
+				return
+			# another process may have replaced the entry since it was read, only drop the file that was checked
+			if (current.st_dev, current.st_ino) != (stale.st_dev, stale.st_ino):
+				return
+
+			os.unlink(path)
+			size = self._read_size()
+			if size is not None:
+				self._write_size(size - current.st_size)
+
+	def get(self, key: tuple) -> typing.Optional[memoryview]:
+		path = self._path(key)
+		try:
+			f = open(path, 'rb')
+		except FileNotFoundError:
+			self.misses += 1
+			return None
+
+		with f:
+			stat = os.fstat(f.fileno())
+			length = self._valid(f.read(_HEADER.size), stat.st_size)
+			if length is None:
+				self.misses += 1
+				# still open, so the inode can't be reused before the check under the lock
+				self._discard(path, stat)
+				return None
+
+			if length == 0:
+				data = memoryview(b'')
+			else:
+				# files are only ever replaced, never rewritten in place, so the mapping stays valid
+				data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))[_HEADER.size:]
+
+		with contextlib.suppress(FileNotFoundError):
+			os.utime(path)
+		self.hits += 1
+		return data
+
+	def set(self, key: tuple, data: typing.Union[bytes, memoryview]) -> None:
+		data = memoryview(data)
+		file_size = _HEADER.size + data.nbytes
+		if file_size > self.max_bytes:
+			return
+
+		ttl = self._ttl_for(key[0])
+		if ttl is not None and ttl <= 0:
+			return
+
+		expires = time.time() + ttl if ttl is not None else 0.0
+		path = self._path(key)
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+
+		fd, tmp = tempfile.mkstemp(dir=self._tmp)
+		try:
+			with os.fdopen(fd, 'wb') as f:
+				f.write(_HEADER.pack(_MAGIC, expires, data.nbytes))
+				f.write(data)
+
+			with self._locked():
+				try:
+					previous = os.path.getsize(path)
+				except FileNotFoundError:
+					previous = 0
+				os.replace(tmp, path)
+
+				size = self._read_size()
+				if size is None:
+					# first run, or the bookkeeping file was lost: recount from disk
+					size = sum(entry[1] for entry in self._scan())
+				else:
+					size += file_size - previous
+				if size > self.max_bytes:
+					size = self._evict()
+				self._write_size(size)
+		except BaseException:
+			with contextlib.suppress(FileNotFoundError):
+				os.unlink(tmp)
+			raise
+
+	def invalidate(self, key: tuple) -> None:
+		path = self._path(key)
+		with self._locked():
+			try:
+				file_size = os.path.getsize(path)
+				os.unlink(path)
+			except FileNotFoundError:
+				return
+			size = self._read_size()
+			if size is not None:
+				self._write_size(size - file_size)
+
+	def clear(self) -> None:
+		with self._locked():
+			for _, _, path in self._scan():
+				with contextlib.suppress(FileNotFoundError):
+					os.unlink(path)
+			self._write_size(0)
+
+	def stats(self) -> dict:
+		size = self._read_size()
+		return {
+			'entries': len(self._scan()),
+			'size': size if size is not None else 0,
+			'max_bytes': self.max_bytes,
+			'hits': self.hits,
+			'misses': self.misses,
+			'evictions': self.evictions,
+		}
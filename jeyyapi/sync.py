@@ -0,0 +1,76 @@
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import threading
+import typing
+
+from .client import JeyyAPIClient
+
+
+class SyncJeyyAPIClient:
+	def __init__(self, api_key: str, **options) -> None:
+		# one loop per facade, shared by every calling thread so they all reuse the same warm pool
+		self._loop = asyncio.new_event_loop()
+		self._thread = threading.Thread(target=self._run, name='jeyyapi-loop', daemon=True)
+		self._thread.start()
+		self._closed = False
+		self.client = JeyyAPIClient(api_key, **options)
+
+	def _run(self) -> None:
+		asyncio.set_event_loop(self._loop)
+		self._loop.run_forever()
+
+	def _schedule(self, coro: typing.Awaitable) -> concurrent.futures.Future:
+		if self._closed:
+			coro.close()
+			raise TypeError('client is already closed')
+		if threading.current_thread() is self._thread:
+			coro.close()
+			raise RuntimeError('blocking call from the client loop thread would deadlock, await the async client instead')
+
+		return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+	def submit(self, endpoint: str, *args, **kwargs) -> concurrent.futures.Future:
+		method = getattr(self.client, endpoint)
+		if not inspect.iscoroutinefunction(method):
+			raise TypeError(f'{endpoint!r} is not a coroutine method of JeyyAPIClient')
+
+		return self._schedule(method(*args, **kwargs))
+
+	def __getattr__(self, name: str):
+		if name.startswith('_'):
+			raise AttributeError(name)
+
+		attr = getattr(self.client, name)
+		if not inspect.iscoroutinefunction(attr):
+			return attr
+
+		@functools.wraps(attr)
+		def blocking(*args, **kwargs):
+			return self._schedule(attr(*args, **kwargs)).result()
+
+		blocking.__signature__ = inspect.signature(attr)
+		return blocking
+
+	def __dir__(self) -> typing.List[str]:
+		return sorted(set(super().__dir__()) | set(dir(self.client)))
+
+	def close(self) -> None:
+		if self._closed:
+			raise TypeError('client is already closed')
+
+		try:
+			if self.client.new_session:
+				self._schedule(self.client.close()).result()
+		finally:
+			self._closed = True
+			self._loop.call_soon_threadsafe(self._loop.stop)
+			self._thread.join()
+			self._loop.close()
+
+	def __enter__(self) -> 'SyncJeyyAPIClient':
+		return self
+
+	def __exit__(self, exc_type, exc, tb) -> None:
+		self.close()
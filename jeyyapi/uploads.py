@@ -0,0 +1,107 @@
+import contextlib
+import hashlib
+import inspect
+import io
+import mmap
+import os
+import time
+import typing
+from collections import OrderedDict
+
+ImageData = typing.Union[bytes, bytearray, memoryview, os.PathLike, typing.BinaryIO, typing.AsyncIterable[bytes]]
+
+_SIGNATURES = (
+	(b'\x89PNG\r\n\x1a\n', 'image/png', 'png'),
+	(b'GIF87a', 'image/gif', 'gif'),
+	(b'GIF89a', 'image/gif', 'gif'),
+	(b'\xff\xd8\xff', 'image/jpeg', 'jpg'),
+	(b'BM', 'image/bmp', 'bmp'),
+)
+
+
+def _is_binary_file(value: typing.Any) -> bool:
+	if isinstance(value, io.IOBase):
+		return not isinstance(value, io.TextIOBase)
+
+	# discord.py's Asset / Attachment have an async read(), those are still sent as their URL
+	read = getattr(value, 'read', None)
+	return callable(read) and not inspect.iscoroutinefunction(read)
+
+
+def is_image_data(value: typing.Any) -> bool:
+	return isinstance(value, (bytes, bytearray, memoryview, os.PathLike)) or hasattr(value, '__aiter__') or _is_binary_file(value)
+
+
+def detect_content_type(data: typing.Union[bytes, memoryview]) -> typing.Tuple[str, str]:
+	head = bytes(data[:16])
+	for signature, content_type, extension in _SIGNATURES:
+		if head.startswith(signature):
+			return content_type, extension
+	if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+		return 'image/webp', 'webp'
+
+	return 'application/octet-stream', 'bin'
+
+
+@contextlib.asynccontextmanager
+async def open_image(value: ImageData) -> typing.AsyncIterator[typing.Union[bytes, memoryview]]:
+	if isinstance(value, (bytes, bytearray, memoryview)):
+		yield value
+	elif isinstance(value, os.PathLike):
+		with open(value, 'rb') as f:
+			if os.fstat(f.fileno()).st_size == 0:
+				yield b''
+				return
+
+			# mapped rather than read so hashing and uploading don't need a private copy
+			with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+				view = memoryview(mm)
+				try:
+					yield view
+				finally:
+					view.release()
+	elif hasattr(value, '__aiter__'):
+		yield b''.join([chunk async for chunk in value])
+	elif _is_binary_file(value):
+		data = value.read()
+		if inspect.isawaitable(data):
+			if inspect.iscoroutine(data):
+				data.close()
+			raise TypeError(f'{type(value).__name__}.read() is asynchronous, pass the bytes or the URL instead')
+		yield data
+	else:
+		raise TypeError(f'expected an image URL or image data, got {type(value).__name__}')
+
+
+def digest(data: typing.Union[bytes, memoryview]) -> str:
+	return hashlib.sha256(data).hexdigest()
+
+
+class UploadCache:
+	def __init__(self, ttl: typing.Optional[float] = 3600.0, max_entries: int = 1024) -> None:
+		self.ttl = ttl
+		self.max_entries = max_entries
+		self._entries: 'OrderedDict[str, typing.Tuple[str, typing.Optional[float]]]' = OrderedDict()
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def get(self, key: str) -> typing.Optional[str]:
+		entry = self._entries.get(key)
+		if entry is None:
+			return None
+
+		url, expires = entry
+		if expires is not None and expires <= time.monotonic():
+			del self._entries[key]
+			return None
+
+		self._entries.move_to_end(key)
+		return url
+
+	def set(self, key: str, url: str) -> None:
+		expires = time.monotonic() + self.ttl if self.ttl is not None else None
+		self._entries[key] = (url, expires)
+		self._entries.move_to_end(key)
+		while len(self._entries) > self.max_entries:
+			self._entries.popitem(last=False)
@@ -16,5 +16,6 @@ setuptools.setup(
 	license='MIT',
 	packages=['jeyyapi'],
 	install_requires=['aiohttp'],
+	extras_require={'speed': ['orjson'], 'images': ['Pillow']},
 	requirements=requirements
 )
\ No newline at end of file
@@ -0,0 +1,29 @@
+import asyncio
+
+from jeyyapi import CircuitBreaker, DeadlineExceeded, JeyyAPIClient, ResponseTooLarge
+from jeyyapi.breaker import CLOSED, is_failure
+from jeyyapi.mock import MockJeyyAPI
+from jeyyapi.scheduler import Scheduler
+
+
+def test_client_side_errors_are_not_failures():
+	assert not is_failure(ResponseTooLarge('too big', 10))
+	assert not is_failure(DeadlineExceeded('late'))
+
+
+def test_local_queueing_is_not_a_slow_call():
+	async def main():
+		async with MockJeyyAPI(latency=0.01, payload_size=1024) as mock:
+			client = JeyyAPIClient(
+				'key',
+				base_urls=[mock.base_url],
+				coalesce=False,
+				# one slot, so most calls spend far longer queued than slow_call_duration
+				scheduler=Scheduler(1),
+				circuit_breaker=CircuitBreaker(slow_call_duration=0.1, slow_call_rate=0.5, min_calls=5)
+			)
+			await asyncio.gather(*(client.bevel(f'x{i}') for i in range(30)))
+			await client.close()
+			return client.breakers['image'].state
+
+	assert asyncio.run(main()) == CLOSED
@@ -0,0 +1,19 @@
+import pathlib
+import subprocess
+import sys
+
+from jeyyapi.bench import IMPORT_BUDGET_MS, measure_import_time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+def test_import_within_budget(monkeypatch):
+	monkeypatch.chdir(ROOT)
+	best = min(measure_import_time('jeyyapi')) * 1000
+	assert best <= IMPORT_BUDGET_MS, f'import jeyyapi took {best:.1f}ms, budget is {IMPORT_BUDGET_MS:g}ms'
+
+
+def test_import_is_lazy():
+	code = 'import sys, jeyyapi; print(" ".join(m for m in ("aiohttp", "discord", "yarl") if m in sys.modules))'
+	proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, cwd=ROOT)
+	assert proc.stdout.strip() == ''
@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from jeyyapi import JeyyAPIClient, RateLimited, RateLimiter
+from jeyyapi.mock import MockJeyyAPI
+
+
+class BadKeyMock(MockJeyyAPI):
+	def __init__(self, status: int, **kwargs) -> None:
+		super().__init__(latency=0, payload_size=1024, **kwargs)
+		self.status = status
+		self.keys = []
+
+	async def _handle(self, request: web.Request) -> web.Response:
+		key = request.headers['Authorization'].split()[1]
+		self.keys.append(key)
+		if key == 'k1':
+			return web.Response(status=self.status, text='no', headers={'Retry-After': '5', 'X-RateLimit-Remaining': '0'})
+		return await super()._handle(request)
+
+
+def run(status: int, **options) -> list:
+	async def main():
+		async with BadKeyMock(status) as mock:
+			client = JeyyAPIClient(['k1', 'k2'], base_urls=[mock.base_url], **options)
+			started = time.monotonic()
+			await client.bevel('x')
+			await client.bevel('y')
+			elapsed = time.monotonic() - started
+			await client.close()
+			return mock.keys, elapsed
+
+	return asyncio.run(main())
+
+
+def test_429_fails_over_with_rate_limiter():
+	keys, elapsed = run(429, rate_limit=RateLimiter(100, burst=10))
+	assert keys == ['k1', 'k2', 'k2']
+	assert elapsed < 1
+
+
+def test_auth_failure_fails_over():
+	keys, _ = run(401)
+	assert keys == ['k1', 'k2', 'k2']
+
+
+class AlwaysLimitedMock(MockJeyyAPI):
+	def __init__(self) -> None:
+		super().__init__(latency=0, payload_size=1024)
+		self.count = 0
+
+	async def _handle(self, request: web.Request) -> web.Response:
+		self.count += 1
+		return web.Response(status=429, text='limited', headers={'Retry-After': '0'})
+
+
+def limited_requests(keys: list) -> int:
+	async def main():
+		async with AlwaysLimitedMock() as mock:
+			client = JeyyAPIClient(keys, base_urls=[mock.base_url], max_retries=2)
+			with pytest.raises(RateLimited):
+				await asyncio.wait_for(client.bevel('x'), 5)
+			await client.close()
+			return mock.count
+
+	return asyncio.run(main())
+
+
+def test_zero_retry_after_is_bounded():
+	# failover only moves to a different key, and at most once per key per attempt
+	assert limited_requests(['k1']) == 3
+	assert limited_requests(['k1', 'k2']) == 3 * 2
@@ -0,0 +1,40 @@
+import collections.abc
+import copy
+import json
+import pickle
+
+import pytest
+
+from jeyyapi.models import JSONResult
+
+
+def result() -> JSONResult:
+	return JSONResult(b'{"url": "https://example.com/a.png", "nested": {"a": [1, 2]}}')
+
+
+def test_copy():
+	original = result()
+	assert copy.copy(original) == original.data
+	deep = copy.deepcopy(original)
+	assert deep == original
+	assert deep['nested'] is not original['nested']
+
+
+def test_pickle():
+	restored = pickle.loads(pickle.dumps(result()))
+	assert isinstance(restored, JSONResult)
+	assert restored.url == 'https://example.com/a.png'
+
+
+def test_private_attribute_is_missing():
+	with pytest.raises(AttributeError):
+		result()._missing
+
+
+def test_mapping():
+	value = result()
+	assert isinstance(value, collections.abc.Mapping)
+	assert dict(value) == value.data
+	assert json.loads(json.dumps(value.data)) == value
+	with pytest.raises(TypeError):
+		hash(value)
@@ -0,0 +1,59 @@
+import asyncio
+import concurrent.futures
+import io
+import multiprocessing
+
+import pytest
+
+from jeyyapi.errors import ResponseTooLarge
+from jeyyapi.postprocess import PostProcess, run
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def process(data: bytes, **options) -> bytes:
+	async def main():
+		with concurrent.futures.ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as executor:
+			return await run(executor, data, PostProcess.create(**options))
+
+	return asyncio.run(main())
+
+
+def noise_gif(frames: int = 4, size: int = 128) -> bytes:
+	images = [Image.effect_noise((size, size), 60 + i).convert('P') for i in range(frames)]
+	buffer = io.BytesIO()
+	images[0].save(buffer, 'GIF', save_all=True, append_images=images[1:], duration=40, loop=0)
+	return buffer.getvalue()
+
+
+def test_invalid_image_raises_pillow_error():
+	# used to be masked by BufferError from closing the shared memory
+	with pytest.raises(Image.UnidentifiedImageError):
+		process(b'not an image', format='webp')
+
+
+def test_frames_and_size():
+	image = Image.open(io.BytesIO(process(noise_gif(8), max_frames=4, max_size=64)))
+	assert image.n_frames == 4
+	assert max(image.size) <= 64
+
+
+def test_unreachable_max_bytes_raises():
+	with pytest.raises(ResponseTooLarge):
+		process(noise_gif(), max_bytes=1)
+
+
+def noise_jpeg(size: int = 128) -> bytes:
+	buffer = io.BytesIO()
+	Image.effect_noise((size, size), 60).convert('RGB').save(buffer, 'JPEG')
+	return buffer.getvalue()
+
+
+def test_source_format_is_kept():
+	data = noise_jpeg()
+	assert process(data, max_bytes=len(data)) == data
+	assert Image.open(io.BytesIO(process(data, max_size=64))).format == 'JPEG'
+
+
+def test_jpeg_output():
+	assert Image.open(io.BytesIO(process(noise_gif(), format='jpg'))).format == 'JPEG'
@@ -0,0 +1,37 @@
+import asyncio
+import logging
+
+from jeyyapi import JeyyAPIClient
+from jeyyapi.mock import MockJeyyAPI
+
+
+def run(callback) -> None:
+	async def main():
+		async with MockJeyyAPI(latency=0, payload_size=1024) as mock:
+			client = JeyyAPIClient('key', base_urls=[mock.base_url], on_request_end=callback)
+			await client.bevel('x')
+			await client.bevel('y')
+			await client.close()
+			assert not client._callbacks
+
+	asyncio.run(main())
+
+
+def test_async_callback_finishes_before_close():
+	seen = []
+
+	async def callback(stats):
+		await asyncio.sleep(0.05)
+		seen.append(stats.status)
+
+	run(callback)
+	assert seen == [200, 200]
+
+
+def test_async_callback_errors_are_logged(caplog):
+	async def callback(stats):
+		raise ValueError('broken sink')
+
+	with caplog.at_level(logging.ERROR, logger='jeyyapi.client'):
+		run(callback)
+	assert [record.exc_info[0] for record in caplog.records] == [ValueError, ValueError]
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from jeyyapi import APIError, JeyyAPIClient, RateLimited
+from jeyyapi.mock import MockJeyyAPI
+
+
+class FlakyMock(MockJeyyAPI):
+	def __init__(self, statuses: list, headers: dict = None, delay: float = 0.0) -> None:
+		super().__init__(latency=0, payload_size=1024)
+		self.statuses = list(statuses)
+		self.headers = headers or {}
+		self.delay = delay
+		self.count = 0
+
+	async def _handle(self, request: web.Request) -> web.Response:
+		self.count += 1
+		await asyncio.sleep(self.delay)
+		if self.statuses:
+			return web.Response(status=self.statuses.pop(0), text='busy', headers=self.headers)
+		return await super()._handle(request)
+
+
+def call(mock: FlakyMock, **options):
+	async def main():
+		async with mock:
+			client = JeyyAPIClient('key', base_urls=[mock.base_url], **options)
+			started = time.monotonic()
+			try:
+				return await client.bevel('x'), time.monotonic() - started
+			finally:
+				await client.close()
+
+	return asyncio.run(main())
+
+
+@pytest.fixture
+def full_backoff(monkeypatch):
+	# the upper end of the jitter range, so delays are predictable
+	monkeypatch.setattr('jeyyapi.client.random.uniform', lambda low, high: high)
+
+
+def test_retries_until_success(full_backoff):
+	mock = FlakyMock([503, 502])
+	_, elapsed = call(mock, backoff_base=0.05)
+	assert mock.count == 3
+	assert elapsed >= 0.05 + 0.1
+
+
+def test_gives_up_after_max_retries(full_backoff):
+	mock = FlakyMock([503] * 10)
+	with pytest.raises(APIError) as info:
+		call(mock, max_retries=2, backoff_base=0.01)
+	assert info.value.status == 503
+	assert mock.count == 3
+
+
+def test_backoff_is_capped(full_backoff):
+	client = JeyyAPIClient('key', backoff_base=0.5, backoff_max=2.0)
+	assert [client._backoff(attempt) for attempt in range(4)] == [0.5, 1.0, 2.0, 2.0]
+
+
+def test_long_retry_after_raises_rate_limited():
+	mock = FlakyMock([429] * 10, headers={'Retry-After': '60'})
+	with pytest.raises(RateLimited) as info:
+		call(mock, backoff_max=5.0)
+	assert info.value.retry_after == 60
+	assert mock.count == 1
+
+
+def test_total_timeout_is_not_retried():
+	mock = FlakyMock([], delay=0.5)
+	with pytest.raises(asyncio.TimeoutError):
+		call(mock, timeout=aiohttp.ClientTimeout(total=0.1))
+	assert mock.count == 1
@@ -0,0 +1,60 @@
+import os
+import time
+
+from jeyyapi.store import DiskStore
+
+
+def entry_sizes(store: DiskStore) -> int:
+	return sum(entry[1] for entry in store._scan())
+
+
+def test_shared_directory(tmp_path):
+	first = DiskStore(tmp_path, 4096)
+	second = DiskStore(tmp_path, 4096)
+
+	first.set(('image/a',), b'a' * 100)
+	assert bytes(second.get(('image/a',))) == b'a' * 100
+
+	second.invalidate(('image/a',))
+	assert first.get(('image/a',)) is None
+	assert first.stats()['size'] == 0
+
+
+def test_expired_entry_is_accounted(tmp_path):
+	first = DiskStore(tmp_path, 4096, ttls={'short': 0.01})
+	second = DiskStore(tmp_path, 4096)
+
+	first.set(('image/short',), b'x' * 100)
+	first.set(('image/long',), b'y' * 100)
+	time.sleep(0.05)
+
+	assert second.get(('image/short',)) is None
+	assert not os.path.exists(second._path(('image/short',)))
+	assert second.stats()['size'] == entry_sizes(second) == first.stats()['size']
+
+
+def test_replaced_entry_is_kept(tmp_path):
+	first = DiskStore(tmp_path, 4096, ttls={'short': 0.01})
+	second = DiskStore(tmp_path, 4096)
+
+	key = ('image/short',)
+	first.set(key, b'old')
+	stale = os.stat(first._path(key))
+	time.sleep(0.05)
+
+	# written by another instance between the stale read and the unlink
+	second.set(key, b'new')
+	first._discard(first._path(key), stale)
+	assert bytes(second.get(key)) == b'new'
+	assert second.stats()['size'] == entry_sizes(second)
+
+
+def test_eviction_across_instances(tmp_path):
+	stores = [DiskStore(tmp_path, 2000, low_water=0.5) for _ in range(2)]
+	for i in range(20):
+		stores[i % 2].set(('image/item', i), bytes(200))
+
+	assert entry_sizes(stores[0]) <= 2000
+	assert stores[0].stats()['size'] == stores[1].stats()['size'] == entry_sizes(stores[0])
+	assert stores[0].evictions + stores[1].evictions > 0
+	assert stores[1].get(('image/item', 19)) is not None
@@ -0,0 +1,47 @@
+import asyncio
+import io
+
+import pytest
+
+from jeyyapi import JeyyAPIClient
+from jeyyapi.mock import MockJeyyAPI
+
+
+class RecordingMock(MockJeyyAPI):
+	def __init__(self) -> None:
+		super().__init__(latency=0, payload_size=4096)
+		self.queries = []
+
+	async def _handle(self, request):
+		self.queries.append(dict(request.query))
+		return await super()._handle(request)
+
+
+def stream(*args, **params):
+	async def main():
+		async with RecordingMock() as mock:
+			client = JeyyAPIClient('key', base_urls=[mock.base_url])
+			try:
+				buffer = io.BytesIO()
+				written = await client.save(*args, buffer, **params)
+				return written, mock.queries
+			finally:
+				await client.close()
+
+	return asyncio.run(main())
+
+
+def test_params_are_converted():
+	written, queries = stream('hearts', image_url='https://example.com/a.png', rainbow=True)
+	assert written == 4096
+	assert queries[-1] == {'image_url': 'https://example.com/a.png', 'rainbow': 'True'}
+
+
+def test_image_data_is_uploaded():
+	_, queries = stream('bevel', image_url=b'GIF89a')
+	assert queries[-1]['image_url'].startswith('http')
+
+
+def test_unknown_argument_is_rejected():
+	with pytest.raises(TypeError):
+		stream('bevel', image_url='https://example.com/a.png', nope=1)
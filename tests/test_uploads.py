@@ -0,0 +1,39 @@
+import io
+
+from jeyyapi.endpoints import ENDPOINTS
+from jeyyapi.uploads import is_image_data
+
+
+class Asset:
+	# shaped like discord.py's Asset: async read(), str() is the URL
+	url = 'https://cdn.discordapp.com/avatars/1/abc.png'
+
+	def __str__(self) -> str:
+		return self.url
+
+	async def read(self) -> bytes:
+		return b''
+
+
+def bevel():
+	return next(endpoint for endpoint in ENDPOINTS if endpoint.name == 'bevel')
+
+
+def test_async_read_is_not_image_data():
+	assert not is_image_data(Asset())
+	assert not is_image_data(io.StringIO('text'))
+
+
+def test_binary_files_are_image_data():
+	assert is_image_data(io.BytesIO(b'GIF89a'))
+	assert is_image_data(b'GIF89a')
+
+
+def test_asset_is_sent_as_its_url():
+	params = bevel().bind((Asset(),), {})
+	assert params['image_url'] == Asset.url
+
+
+def test_file_passes_through():
+	buffer = io.BytesIO(b'GIF89a')
+	assert bevel().bind((buffer,), {})['image_url'] is buffer